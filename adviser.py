@@ -0,0 +1,122 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# ─── Punto de entrada de línea de comandos ───────────────────────────────────
+#   python -m adviser               → app completa (ventana + asistente)
+#   python -m adviser --headless    → sólo asistente y notificaciones
+#   python -m adviser --perfil [HZ] → perfila los hilos por muestreo y guarda
+#                                     perfil.collapsed / perfil.txt al salir
+#   python -m adviser --import-budget 150
+#                                   → falla si importar adviser_main tarda más
+#                                     de 150 ms o arrastra la GUI
+#   python -m adviser now | next    → franja actual / próxima (instancia abierta)
+#   python -m adviser crono start 25m [tarea ...] | pause | resume | stop | estado
+#                                   → controla el cronómetro de la instancia abierta
+
+
+_SCRIPT_IMPORTACION = """
+import sys, time
+t0 = time.perf_counter()
+import adviser_main
+ms = (time.perf_counter() - t0) * 1000
+gui = sorted(m for m in ("webview", "winotify", "win32gui", "clr") if m in sys.modules)
+print(f"{ms:.1f} {','.join(gui)}")
+"""
+
+
+def comprobar_importacion(presupuesto_ms):
+    """Importa adviser_main en un proceso limpio y controla tiempo y módulos."""
+    salida = subprocess.run([sys.executable, "-c", _SCRIPT_IMPORTACION],
+                            capture_output=True, text=True)
+    if salida.returncode != 0:
+        print(salida.stderr.strip())
+        return 1
+    ms, _, gui = salida.stdout.strip().partition(" ")
+    ms = float(ms)
+    print(f"[Adviser] import adviser_main: {ms:.1f} ms (presupuesto {presupuesto_ms:.0f} ms)")
+    if gui:
+        print(f"[Adviser] Módulos de GUI importados de más: {gui}")
+        return 1
+    return 0 if ms <= presupuesto_ms else 1
+
+
+def parsear_duracion(texto):
+    """'25m', '1h30m', '90s' o '25' (minutos) → segundos."""
+    texto = texto.strip().lower()
+    if texto.isdigit():
+        return int(texto) * 60
+    partes = re.fullmatch(r"(?:(\d+)h)?(?:(\d+)m(?:in)?)?(?:(\d+)s)?", texto)
+    if not partes or not any(partes.groups()):
+        raise ValueError(f"duración inválida: {texto!r}")
+    h, m, s = (int(g or 0) for g in partes.groups())
+    return h * 3600 + m * 60 + s
+
+
+def _mostrar(respuesta):
+    if "titulo" in respuesta:
+        print(f"{respuesta['dia']} {respuesta['inicio']}  {respuesta['titulo']}")
+        print(f"  {respuesta['mensaje']}")
+    elif "restantes" in respuesta:
+        if not respuesta["activo"]:
+            print("Cronómetro detenido.")
+        else:
+            mm, ss = divmod(respuesta["restantes"], 60)
+            pausa = " (en pausa)" if respuesta["pausado"] else ""
+            print(f"{mm:02d}:{ss:02d}{pausa}  {respuesta['hechas']}/{respuesta['total']} tareas")
+    elif not respuesta.get("ok", False):
+        print(f"Error: {respuesta.get('error', 'desconocido')}")
+    else:
+        print("OK")
+
+
+def ejecutar_comando(palabras):
+    """Manda el comando a la instancia abierta (no importa adviser_main ni la GUI)."""
+    from instancia import enviar
+
+    cmd, args = palabras[0], palabras[1:]
+    if cmd == "crono" and len(args) >= 2 and args[0] == "start":
+        try:
+            args = ["start", parsear_duracion(args[1])] + args[2:]
+        except ValueError as e:
+            print(e)
+            return 2
+    carpeta   = os.path.dirname(os.path.abspath(__file__))
+    respuesta = enviar(carpeta, cmd, args)
+    if respuesta is None:
+        print("Adviser no está abierto.")
+        return 1
+    _mostrar(respuesta)
+    return 0 if respuesta.get("ok", False) else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="adviser", description="Asistente de rutina personal.")
+    parser.add_argument("--headless", action="store_true",
+                        help="corre sólo el asistente y las notificaciones, sin ventanas")
+    parser.add_argument("--perfil", type=float, nargs="?", const=100.0, metavar="HZ",
+                        help="perfila los hilos por muestreo (HZ muestras/s, 100 por defecto)")
+    parser.add_argument("--import-budget", type=float, metavar="MS",
+                        help="mide el import de adviser_main y falla si supera MS milisegundos")
+    parser.add_argument("comando", nargs="*",
+                        help="now | next | crono start 25m [tarea ...] | crono pause|resume|stop|estado")
+    args = parser.parse_args(argv)
+
+    if args.comando:
+        return ejecutar_comando(args.comando)
+
+    if args.import_budget is not None:
+        return comprobar_importacion(args.import_budget)
+
+    import adviser_main
+    if args.headless:
+        adviser_main.ejecutar_headless(perfil=args.perfil)
+    else:
+        adviser_main.main(perfil=args.perfil)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,68 +1,37 @@
-import time
 import sys
 import os
 import json
-import queue
 import threading
-import webview
-
-# win32gui es parte de pywin32. Si no está, usamos ctypes como fallback
-# (ctypes siempre está disponible en Windows sin instalar nada extra).
-try:
-    import win32gui
-    import win32con
-    _WIN32_AVAILABLE = True
-except ImportError:
-    _WIN32_AVAILABLE = False
-
-# Fallback via ctypes — funciona sin pywin32
-import ctypes
-import ctypes.wintypes
-_SW_SHOWMINIMIZED = 2
-
-def _hwnd_por_titulo(titulo):
-    """Busca un HWND por título de ventana usando ctypes puro."""
-    result = ctypes.c_ulong(0)
-    FindWindowW = ctypes.windll.user32.FindWindowW
-    FindWindowW.restype = ctypes.wintypes.HWND
-    hwnd = FindWindowW(None, titulo)
-    return hwnd
-
-def _esta_minimizada_ctypes(titulo):
-    """Detecta si una ventana está minimizada usando ctypes (sin pywin32)."""
-    try:
-        hwnd = _hwnd_por_titulo(titulo)
-        if not hwnd:
-            return False
-        # GetWindowPlacement via ctypes
-        class WINDOWPLACEMENT(ctypes.Structure):
-            _fields_ = [
-                ("length",           ctypes.c_uint),
-                ("flags",            ctypes.c_uint),
-                ("showCmd",          ctypes.c_uint),
-                ("ptMinPosition",    ctypes.wintypes.POINT),
-                ("ptMaxPosition",    ctypes.wintypes.POINT),
-                ("rcNormalPosition", ctypes.wintypes.RECT),
-            ]
-        wp = WINDOWPLACEMENT()
-        wp.length = ctypes.sizeof(wp)
-        ctypes.windll.user32.GetWindowPlacement(hwnd, ctypes.byref(wp))
-        return wp.showCmd == _SW_SHOWMINIMIZED
-    except Exception:
-        return False
+import time
 
-from winotify import Notification, audio
 from datetime import datetime
 
+from planificador import Planificador, RelojReal, indice_slot
+from cronometro import MotorCronometro, EstadoCrono, CRONO_INACTIVO
+from despachador import Despachador
+from canal_push import CanalPush
+from estado_ventana import crear_proveedor
+from persistencia import EscritorDiferido, Diario, escribir_atomico
+from rutina import Rutina, DIAS
+from perfiles import AlmacenPerfiles
+from notificaciones import (Notificador, BackendWinotify, BackendLog,
+                            backend_por_defecto)
+from metricas import Metricas, medir_bridge, hilos
+from historial import Historial
+from recarga import crear_vigilante
+from agenda import Agenda
+from overlay_ventana import OverlayWebview
+
 # ─── Constantes ───────────────────────────────────────────────────────────────
-DIAS  = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
-HORAS = list(range(24))
+SESION_CRONO   = "principal"
+PAGINA_OVERLAY = 30     # tareas pendientes que el overlay pide por vez
+PUSH_OVERLAY   = 0.1    # segundos que se juntan cambios de tareas antes de enviarlos
 
 if getattr(sys, 'frozen', False):
     # Ejecutando como .exe compilado con PyInstaller
     _app_path = os.path.dirname(sys.executable)
-    # Si los HTML no están junto al .exe (caso --onefile), buscar en _MEIPASS
-    if not os.path.exists(os.path.join(_app_path, "ui.html")):
+    # Si los datos no están junto al .exe (caso --onefile), buscar en _MEIPASS
+    if not os.path.exists(os.path.join(_app_path, "rutina.json")):
         _app_path = sys._MEIPASS
 else:
     _app_path = os.path.dirname(os.path.abspath(__file__))
@@ -72,11 +41,28 @@ def _ruta_web(nombre):
     ruta = os.path.join(_app_path, nombre)
     return "file:///" + ruta.replace("\\", "/")
 
-RUTA_JSON           = os.path.join(_app_path, "rutina.json")
 RUTA_ICON           = os.path.join(_app_path, "icon.png")
-RUTA_CONFIG         = os.path.join(_app_path, "config.json")
-RUTA_HTML           = _ruta_web("ui.html")
-RUTA_OVERLAY        = _ruta_web("overlay.html")
+RUTA_LOG            = os.path.join(_app_path, "adviser.log")
+
+
+def _pagina_web(nombre):
+    """Argumentos de create_window para una página: el HTML del bundle en
+    memoria si está (ver empaquetar.py), si no el archivo por file:///."""
+    from empaquetar import cargar
+    html = cargar(nombre, _app_path)
+    if html is not None:
+        return {"html": html}
+    return {"url": _ruta_web(nombre)}
+
+
+# ─── Imports diferidos ───────────────────────────────────────────────────────
+# pywebview (y con él WebView2/WinForms) se importa recién cuando hace falta
+# la primera ventana. Así el modo headless y las herramientas de línea de
+# comandos arrancan sin cargar la GUI, y el módulo se puede importar fuera
+# de Windows.
+def _webview():
+    import webview
+    return webview
 
 
 # ─── Helpers ─────────────────────────────────────────────────────────────────
@@ -84,105 +70,354 @@ def cargar_json(ruta, default):
     try:
         with open(ruta, "r", encoding="utf-8") as f:
             return json.load(f)
-    except Exception:
+    except FileNotFoundError:
+        return default
+    except Exception as e:
+        print(f"[Adviser] No se pudo leer {os.path.basename(ruta)}: {e}")
         return default
 
 def guardar_json(ruta, datos):
+    """Escritura sincrónica y atómica. La app usa el escritor diferido."""
     try:
-        with open(ruta, "w", encoding="utf-8") as f:
-            json.dump(datos, f, indent=4, ensure_ascii=False)
+        escribir_atomico(ruta, datos)
         return True
     except Exception:
         return False
 
-def inicializar_dia(bd, dia):
-    vacio = ["(Vacío)", "Sin actividad asignada"]
-    if dia not in bd:
-        bd[dia] = [list(vacio) for _ in HORAS]
-    elif len(bd[dia]) != len(HORAS):
-        while len(bd[dia]) < len(HORAS):
-            bd[dia].append(list(vacio))
-        bd[dia] = bd[dia][:len(HORAS)]
-    return bd[dia]
-
-def _toast(titulo, mensaje, loop=True):
-    try:
-        t = Notification(app_id="Adviser", title=titulo, msg=mensaje,
-                         duration="long", icon=RUTA_ICON)
-        t.set_audio(audio.LoopingCall if loop else audio.Reminder, loop=loop)
-        t.show()
-    except Exception:
-        pass
+def ruta_diario(ruta_json):
+    """rutina.json → rutina.diario.jsonl (journal de celdas de ese archivo)."""
+    return os.path.splitext(ruta_json)[0] + ".diario.jsonl"
+
+def aplicar_diario(rutina, entradas):
+    """Aplica sobre `rutina` las celdas registradas en el journal ("dia/slot")."""
+    for clave, celda in entradas:
+        try:
+            dia, slot = clave.split("/")
+            rutina.fijar(dia, int(slot), celda[0], celda[1])
+        except (ValueError, IndexError, TypeError):
+            continue
+
+def _crear_backend_notificaciones(config, ruta_log=RUTA_LOG):
+    modo = config.get("notificaciones", "auto")
+    if modo == "winotify":
+        return BackendWinotify(RUTA_ICON)
+    if modo == "log":
+        return BackendLog(ruta_log)
+    return backend_por_defecto(RUTA_ICON, ruta_log)
 
 
 # ─── Cola para el hilo principal ─────────────────────────────────────────────
 # PROBLEMA RAÍZ: webview.create_window() y window.destroy() SOLO pueden
 # llamarse desde el hilo principal de pywebview. Usar un threading.Thread
 # para crearlos falla silenciosamente.
-# SOLUCIÓN: una cola que el loop principal drena cada 200ms.
-_main_queue = queue.Queue()
-
-def _drain_queue():
-    while True:
-        try:
-            fn = _main_queue.get_nowait()
-            fn()
-        except queue.Empty:
-            break
-        except Exception as e:
-            print(f"[Adviser queue] Error: {e}")
-
+# SOLUCIÓN: un despachador que el hilo principal atiende bloqueado hasta que
+# llega trabajo (ver despachador.py).
+_main_queue = Despachador()
 
 # ─── API ──────────────────────────────────────────────────────────────────────
+# Cada método público es una llamada del bridge y queda medido (ver metricas.py)
+@medir_bridge
 class AdviserAPI:
-    def __init__(self):
-        self.bd           = cargar_json(RUTA_JSON, {})
-        self.config       = cargar_json(RUTA_CONFIG, {"tema": "dark"})
+    def __init__(self, reloj=None, carpeta=None, notificador=None, overlay=None, headless=False):
+        """
+        reloj       -- RelojReal por defecto (RelojFalso en benchmarks)
+        carpeta     -- dónde leer rutina.json y config.json (por defecto la de la app)
+        notificador -- reemplaza al que se arma según config.json
+        headless    -- True si corre sin ventanas (ejecutar_headless)
+        """
+        carpeta           = carpeta or _app_path
+        self._carpeta     = carpeta
+        self._ruta_config = os.path.join(carpeta, "config.json")
+        self.config       = cargar_json(self._ruta_config, {"tema": "dark"})
         self.running_flag = [False]
         self._window      = None
-
-        self._crono = {
-            "activo":         False,
-            "tareas":         [],
-            "segs_restantes": 0,
-            "segs_total":     0,
-        }
-        self._overlay_win  = None
-        self._overlay_open = False
+        self._headless    = headless
+        self._metricas    = Metricas()
+
+        # Un solo hilo para todos los avisos de la rutina (ver planificador.py)
+        self._reloj        = reloj or RelojReal()
+        self._planificador = Planificador(self._reloj)
+
+        # Los avisos se entregan en otro hilo (ver notificaciones.py)
+        self._notificador = notificador or Notificador(
+            _crear_backend_notificaciones(self.config, os.path.join(carpeta, "adviser.log")))
+
+        # Escrituras a disco en segundo plano (ver persistencia.py)
+        self._escritor = EscritorDiferido(reloj=self._reloj)
+
+        # Última versión de cada rutina que sabemos que está en disco (la
+        # leída o la escrita): la recarga compara el archivo contra esto
+        self._bases    = {}
+        # Perfiles: sólo se lee el índice; cada rutina se carga al usarla
+        self._perfiles = AlmacenPerfiles(carpeta, os.path.join(carpeta, "rutina.json"),
+                                         self._cargar_rutina, al_escribir=self._anotar_base)
+        self.rutina    = self._perfiles.obtener(self._perfiles.activo)
+        self._diario   = self._crear_diario()
+        # Excepciones con fecha sobre la rutina activa (ver agenda.py)
+        self._agenda   = Agenda(os.path.join(carpeta, "excepciones.json"), lambda: self.rutina)
+        # Cambios externos a la rutina activa se aplican en caliente (ver recarga.py)
+        self._vigilante = None
+
+        # Sesión actual: la referencia se lee sin lock y se reemplaza entera
+        # al iniciar o terminar (ver EstadoCrono); sus tareas tienen lock
+        # propio. Este lock ordena a los que escriben.
+        self._crono      = CRONO_INACTIVO
+        self._crono_lock = threading.Lock()
+        # Cada sesión terminada queda en historial.jsonl (ver historial.py)
+        self._historial  = Historial(os.path.join(carpeta, "historial.jsonl"), self._escritor)
+        # Los segundos restantes los lleva el motor (deadline monotónico)
+        self._motor = MotorCronometro(self._reloj)
+        # El overlay se crea una vez, oculto, y se muestra/oculta (ver overlay_ventana.py)
+        self._overlay = overlay or OverlayWebview(self, lambda: _pagina_web("overlay.html"))
 
         self._window_minimized    = False   # True cuando está minimizada
         self._window_closing      = False   # True cuando se está cerrando (no abrir overlay)
+        self._monitor             = None    # proveedor de estado de ventana
+
+        # Canales de push: sólo mandan lo que cambió, y nada si no se ve
+        self._canal_main = CanalPush(
+            "window._aplicarParche",
+            ventana         = lambda: self._window,
+            estado_completo = lambda: {"segs": self._segs_restantes()},
+            visible         = lambda: not self._window_minimized,
+            metricas        = self._metricas,
+        )
+        self._canal_overlay = CanalPush(
+            "window._ovParche",
+            ventana         = lambda: self._overlay.ventana,
+            estado_completo = self._estado_overlay,
+            visible         = lambda: self._overlay.visible,
+            metricas        = self._metricas,
+        )
+        self._registrar_medidores()
+        self._programar_volcado_metricas()
 
     # ═════════════════════════════════════════════════════════════════════════
     #  RUTINA
     # ═════════════════════════════════════════════════════════════════════════
     def get_rutina(self):
-        for dia in DIAS:
-            inicializar_dia(self.bd, dia)
-        return self.bd
+        return self.rutina.a_dict()
 
     def get_dia(self, dia):
-        return inicializar_dia(self.bd, dia)
+        return self.rutina.dia(dia)
 
     def guardar_dia(self, dia, entradas):
         try:
-            self.bd[dia] = [[e[0], e[1]] for e in entradas]
-            guardar_json(RUTA_JSON, self.bd)
+            slots   = self.rutina.fijar_dia(dia, entradas)
+            cambios = [(dia, slot, list(self.rutina.celda(dia, slot))) for slot in slots]
+            if cambios:
+                self._persistir_rutina(cambios)
+                self._reprogramar_asistente()
             return {"ok": True}
         except Exception as e:
             return {"ok": False, "error": str(e)}
 
+    def get_rutina_since(self, version, perfil=None):
+        """Sólo las celdas cambiadas desde `version` (o todo si no se puede)."""
+        activo  = self._perfiles.activo
+        rutina  = self.rutina
+        cambios = None
+        if perfil in (None, activo):
+            actual, cambios = rutina.delta(version)
+        if cambios is None:
+            actual, datos = rutina.foto()
+            return {
+                "completo":     True,
+                "perfil":       activo,
+                "version":      actual,
+                "slot_minutos": rutina.slot_minutos,
+                "rutina":       datos,
+            }
+        return {
+            "completo": False,
+            "perfil":   activo,
+            "version":  actual,
+            "celdas":   [list(c) for c in cambios],
+        }
+
+    def guardar_celda(self, dia, slot, titulo, mensaje):
+        """Guarda una sola franja."""
+        try:
+            _, version, hechos = self.rutina.aplicar([(dia, int(slot), titulo, mensaje)])
+            if hechos:
+                self._persistir_rutina([(dia, int(slot), list(self.rutina.celda(dia, slot)))])
+                self._reprogramar_asistente()
+            return {"ok": True, "version": version}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def call_many(self, llamadas):
+        """Ejecuta varias llamadas del bridge en un solo viaje.
+
+        `llamadas` es una lista de [metodo, [args...]]; devuelve la lista de
+        resultados en el mismo orden.
+        """
+        resultados = []
+        for metodo, args in llamadas:
+            fn = getattr(self, metodo, None) if isinstance(metodo, str) else None
+            if fn is None or metodo.startswith("_") or metodo == "call_many" or not callable(fn):
+                resultados.append({"ok": False, "error": f"método no permitido: {metodo}"})
+                continue
+            try:
+                resultados.append(fn(*(args or [])))
+            except Exception as e:
+                resultados.append({"ok": False, "error": str(e)})
+        return resultados
+
+    def _cargar_rutina(self, ruta):
+        rutina = Rutina.desde_dict(cargar_json(ruta, {}), self.config.get("slot_minutos"))
+        if self.config.get("diario_rutina", False):
+            aplicar_diario(rutina, Diario.leer(ruta_diario(ruta)))
+        self._anotar_base(ruta, rutina)
+        return rutina
+
+    def _anotar_base(self, ruta, rutina):
+        """`rutina` es lo que hay ahora en disco para `ruta`."""
+        self._bases[os.path.abspath(ruta)] = rutina.copia()
+
+    def _serializar_rutina(self, ruta, rutina):
+        """JSON de una copia de `rutina`, anotada como base (para compactar)."""
+        copia = rutina.copia()
+        self._anotar_base(ruta, copia)
+        return copia.a_json()
+
+    def _crear_diario(self):
+        if not self.config.get("diario_rutina", False):
+            return None
+        ruta = self._perfiles.ruta(self._perfiles.activo)
+
+        def _al_volcar(entradas):
+            # Lo que llegó al journal también pasa a estar en disco
+            base = self._bases.get(os.path.abspath(ruta))
+            if base is not None:
+                aplicar_diario(base, entradas)
+
+        return Diario(ruta_diario(ruta), self._escritor, al_volcar=_al_volcar)
+
+    def _persistir_rutina(self, cambios):
+        """Agenda la escritura de la rutina. No toca el disco en este hilo."""
+        nombre = self._perfiles.activo
+        if self._diario is None:
+            self._perfiles.guardar(nombre, self._escritor)
+            return
+        for dia, slot, celda in cambios:
+            self._diario.registrar(f"{dia}/{slot}", celda)
+        if self._diario.necesita_compactar():
+            rutina = self.rutina
+            ruta   = self._perfiles.ruta(nombre)
+            self._diario.compactar(ruta, lambda: self._serializar_rutina(ruta, rutina))
+
+    def iniciar_recarga_rutina(self):
+        """Empieza a vigilar el archivo de la rutina activa.
+        `"recarga_rutina"` en config.json: auto | watchdog | polling | no."""
+        modo = self.config.get("recarga_rutina", "auto")
+        if modo == "no" or self._vigilante is not None:
+            return
+        self._vigilante = crear_vigilante(self._perfiles.ruta(self._perfiles.activo),
+                                          self._recargar_rutina, modo)
+        self._vigilante.iniciar()
+
+    def _recargar_rutina(self, ruta):
+        """El archivo cambió por fuera de la app: aplica sólo las celdas distintas.
+
+        Se compara en tres vías: el archivo nuevo contra la última versión que
+        sabemos que estaba en disco (no contra la rutina en memoria). Así las
+        ediciones propias que todavía esperan para escribirse no parecen
+        cambios externos y no se pisan.
+        """
+        if os.path.abspath(self._perfiles.ruta(self._perfiles.activo)) != ruta:
+            return
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except (OSError, ValueError) as e:
+            # Un editor a mitad de guardar: se reintenta con el próximo cambio
+            self._metricas.error("recarga_rutina", e)
+            print(f"[Adviser] {os.path.basename(ruta)} ilegible, no se recarga: {e}")
+            return
+        nueva = Rutina.desde_dict(datos, self.rutina.slot_minutos)
+        if self._diario is not None:
+            aplicar_diario(nueva, Diario.leer(self._diario.ruta))
+        base = self._bases.get(ruta)
+        if base is None or base.slots != nueva.slots:
+            base = self.rutina
+        externos = base.diferencias(nueva)
+        self._anotar_base(ruta, nueva)
+
+        # De una vez: ninguna edición del bridge queda entre desde y version
+        desde, version, cambios = self.rutina.aplicar(externos)
+        if not cambios:
+            return
+        if self._diario is not None:
+            # El snapshot ya tiene lo externo: el journal se pliega sobre él
+            rutina = self.rutina
+            self._diario.compactar(ruta, lambda: self._serializar_rutina(ruta, rutina))
+        print(f"[Adviser] {os.path.basename(ruta)} cambió en disco: {len(cambios)} celda(s).")
+
+        self._llamar_js(self._window, "window._onRutinaExterna", {
+            "completo": False,
+            "perfil":   self._perfiles.activo,
+            "desde":    desde,
+            "version":  version,
+            "celdas":   [list(c) for c in cambios],
+        })
+
+        # Sólo importa si cambió lo que el asistente va a avisar hoy
+        ahora = self._reloj.ahora()
+        hoy   = DIAS[ahora.weekday()]
+        desde_slot = indice_slot(ahora, self._slot_minutos())
+        if any(dia == hoy and slot >= desde_slot for dia, slot, _, _ in cambios):
+            self._reprogramar_asistente()
+
+    # ═════════════════════════════════════════════════════════════════════════
+    #  PERFILES
+    # ═════════════════════════════════════════════════════════════════════════
+    def get_perfiles(self):
+        return {"ok": True, "activo": self._perfiles.activo, "perfiles": self._perfiles.listar()}
+
+    def cambiar_perfil(self, nombre):
+        try:
+            self.rutina  = self._perfiles.activar(nombre)
+            self._diario = self._crear_diario()
+            if self._vigilante is not None:
+                self._vigilante.vigilar(self._perfiles.ruta(nombre))
+            self._perfiles.guardar_indice(self._escritor)
+            self._reprogramar_asistente()
+            return {
+                "ok":           True,
+                "perfil":       nombre,
+                "version":      self.rutina.version,
+                "rutina":       self.rutina.a_dict(),
+                "slot_minutos": self.rutina.slot_minutos,
+            }
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def crear_perfil(self, nombre, copiar_actual=True):
+        """Crea un perfil nuevo (copia de la rutina activa o vacío)."""
+        try:
+            if copiar_actual:
+                base = Rutina.desde_dict(self.rutina.a_json())
+            else:
+                base = Rutina(self.rutina.slot_minutos)
+            self._perfiles.crear(nombre, base, self._escritor)
+            return self.get_perfiles()
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
     # ═════════════════════════════════════════════════════════════════════════
     #  ESTADO / CONFIG
     # ═════════════════════════════════════════════════════════════════════════
     def get_estado_inicial(self):
         ahora = datetime.now()
         return {
-            "dia_actual":  DIAS[ahora.weekday()],
-            "hora_actual": ahora.hour,
-            "fecha_str":   ahora.strftime("%A %d de %B").capitalize(),
-            "tema":        self.config.get("tema", "dark"),
-            "asistente":   self.running_flag[0],
+            "dia_actual":   DIAS[ahora.weekday()],
+            "hora_actual":  ahora.hour,
+            "slot_actual":  self.rutina.slot_de(ahora.hour, ahora.minute),
+            "slot_minutos": self.rutina.slot_minutos,
+            "fecha_str":    ahora.strftime("%A %d de %B").capitalize(),
+            "tema":         self.config.get("tema", "dark"),
+            "asistente":    self.running_flag[0],
         }
 
     def get_hora_actual(self):
@@ -191,7 +426,7 @@ class AdviserAPI:
 
     def guardar_tema(self, tema):
         self.config["tema"] = tema
-        guardar_json(RUTA_CONFIG, self.config)
+        self._escritor.guardar(self._ruta_config, lambda: dict(self.config))
         return {"ok": True}
 
     # ═════════════════════════════════════════════════════════════════════════
@@ -200,147 +435,269 @@ class AdviserAPI:
     def toggle_asistente(self):
         if self.running_flag[0]:
             self.running_flag[0] = False
+            self._planificador.cancelar("asistente")
             return {"ok": True, "estado": False}
         self.running_flag[0] = True
-        threading.Thread(target=self._loop_asistente, daemon=True).start()
+        # Primer aviso inmediato, después uno por cada inicio de franja
+        self._planificador.programar("asistente", self._reloj.time(), self._disparar_asistente)
         return {"ok": True, "estado": True}
 
-    def _loop_asistente(self):
-        while self.running_flag[0]:
-            ahora   = datetime.now()
-            dia     = DIAS[ahora.weekday()]
-            hora    = ahora.hour
-            minuto  = ahora.minute
-            segundo = ahora.second
-
-            titulo  = "(Vacío)"
-            mensaje = "Sin actividad asignada"
-            if dia in self.bd and hora < len(self.bd[dia]):
-                titulo  = self.bd[dia][hora][0]
-                mensaje = self.bd[dia][hora][1]
-
-            # 1. Mostrar notificación de Windows
-            _toast(titulo, mensaje)
-
-            # 2. Notificar a la ventana principal (resalta hora actual)
-            if self._window:
-                try:
-                    self._window.evaluate_js(
-                        f"window._onAsistenteHora && window._onAsistenteHora({hora})"
-                    )
-                except Exception:
-                    pass
-
-            espera = 3600 - (minuto * 60 + segundo)
-            for _ in range(espera + 2):
-                if not self.running_flag[0]:
-                    break
-                time.sleep(1)
+    def _slot_minutos(self):
+        return self.rutina.slot_minutos
+
+    def _programar_asistente(self):
+        """Agenda el próximo aviso en el siguiente inicio de franja."""
+        limite, _, _ = self._agenda.proxima(self._reloj.ahora())
+        self._planificador.programar("asistente", limite.timestamp(), self._disparar_asistente)
+
+    def _reprogramar_asistente(self):
+        """Recalcula el próximo aviso (p. ej. tras editar la rutina)."""
+        if self.running_flag[0]:
+            self._programar_asistente()
+
+    def _disparar_asistente(self):
+        if not self.running_flag[0]:
+            return
+        ahora = self._reloj.ahora()
+        slot  = indice_slot(ahora, self._slot_minutos())
+
+        # Con las excepciones del día aplicadas (feriados, exámenes...)
+        titulo, mensaje = self._agenda.celda(ahora, slot)
+
+        # 1. Mostrar notificación de Windows (no bloquea este hilo)
+        self._notificador.enviar(titulo, mensaje, loop=True)
+
+        # 2. Notificar a la ventana principal (resalta hora actual)
+        self._llamar_js(self._window, "window._onAsistenteHora", slot)
+
+        self._reprogramar_asistente()
 
     # ═════════════════════════════════════════════════════════════════════════
     #  CRONÓMETRO
     # ═════════════════════════════════════════════════════════════════════════
     def crono_iniciar(self, tareas_json, segs_total):
         tareas = json.loads(tareas_json) if isinstance(tareas_json, str) else list(tareas_json)
-        self._crono["activo"]         = True
-        self._crono["tareas"]         = tareas
-        self._crono["segs_restantes"] = int(segs_total)
-        self._crono["segs_total"]     = int(segs_total)
-        threading.Thread(target=self._loop_crono, daemon=True).start()
-        return {"ok": True}
-
-    def crono_toggle_tarea(self, idx, done):
+        with self._crono_lock:
+            # Una sesión en curso que se reemplaza queda en el historial como
+            # cancelada, con lo que llevaba usado hasta ahora
+            previo = self._crono
+            if previo.activo:
+                previo    = previo.terminada()
+                restantes = self._segs_restantes()
+            else:
+                previo = None
+            self._crono = sesion = EstadoCrono.nuevo(tareas, segs_total, self._reloj.time())
+            # Reiniciar reemplaza la sesión anterior: nunca quedan dos contadores.
+            # El fin lleva su sesión: uno que llega tarde no termina la nueva
+            self._motor.iniciar(SESION_CRONO, int(segs_total), on_tick=self._on_crono_tick,
+                                on_fin=lambda nombre: self._on_crono_fin(nombre, sesion))
+            # El JS ya arranca mostrando segs_total: esa es la base del canal
+            v = self._canal_main.sincronizado({"segs": int(segs_total)})
+            self._canal_overlay.invalidar()
+        if previo is not None:
+            self._registrar_sesion(previo, "cancelada", restantes)
+        # Ids estables, en el mismo orden de la lista que mandó el JS
+        return {"ok": True, "v": v, "ids": self._crono.tareas.ids()}
+
+    def crono_pausar(self):
+        return {"ok": self._motor.pausar(SESION_CRONO)}
+
+    def crono_reanudar(self):
+        return {"ok": self._motor.reanudar(SESION_CRONO)}
+
+    def crono_toggle_tarea(self, tarea_id, done):
+        """Marca la tarea con ese id (el que devolvió crono_iniciar)."""
         try:
-            self._crono["tareas"][int(idx)]["done"] = bool(done)
-            self._push_overlay()
+            with self._crono_lock:
+                crono = self._crono
+                if not crono.activo:
+                    return {"ok": False, "error": "no hay un cronómetro en curso"}
+                tarea = crono.tareas.marcar(tarea_id, done)
+                if tarea is not None:
+                    self._canal_overlay.cambio_item(tarea.id, done=tarea.done, texto=tarea.texto)
+                    self._canal_overlay.campo("hechas", crono.hechas)
+            self._agendar_push_overlay()
             return {"ok": True}
-        except Exception:
-            return {"ok": False}
+        except Exception as e:
+            self._metricas.error("crono_toggle_tarea", e)
+            return {"ok": False, "error": str(e)}
     def crono_agregar_tarea(self, texto):
         """Agrega una tarea nueva al cronómetro en curso y notifica al overlay."""
         try:
-            self._crono["tareas"].append({"texto": texto, "done": False})
-            self._push_overlay()   # notifica al overlay inmediatamente
-            return {"ok": True, "total": len(self._crono["tareas"])}
+            with self._crono_lock:
+                crono = self._crono
+                if not crono.activo:
+                    return {"ok": False, "error": "no hay un cronómetro en curso"}
+                tarea = crono.tareas.agregar(texto)
+                self._canal_overlay.item_nuevo(tarea._asdict())
+                self._canal_overlay.campo("total", crono.total)
+            self._agendar_push_overlay()
+            return {"ok": True, "id": tarea.id, "total": crono.total}
         except Exception as e:
             return {"ok": False, "error": str(e)}
     def crono_finalizar(self):
-        self._crono["activo"] = False
-        _main_queue.put(self._destruir_overlay)
+        self._registrar_sesion(self._terminar_crono(), "completa")
+        self._motor.cancelar(SESION_CRONO)
+        self._al_hilo_principal(self._ocultar_overlay)
         return {"ok": True}
 
     def crono_cancelar(self):
-        self._crono["activo"] = False
-        _main_queue.put(self._destruir_overlay)
+        self._registrar_sesion(self._terminar_crono(), "cancelada")
+        self._motor.cancelar(SESION_CRONO)
+        self._al_hilo_principal(self._ocultar_overlay)
         return {"ok": True}
 
     def notificar_alarma_crono(self, titulo, mensaje):
-        _toast(titulo, mensaje, loop=False)
+        self._notificador.enviar(titulo, mensaje, loop=False)
         return {"ok": True}
 
-    def _loop_crono(self):
-        while self._crono["activo"] and self._crono["segs_restantes"] > 0:
-            time.sleep(1)
-            if not self._crono["activo"]:
-                return
-            self._crono["segs_restantes"] -= 1
-
-            if self._window:
-                try:
-                    segs = self._crono["segs_restantes"]
-                    self._window.evaluate_js(
-                        f"window._cronoPythonTick && window._cronoPythonTick({segs})"
-                    )
-                except Exception:
-                    pass
+    def _segs_restantes(self):
+        return self._motor.restantes(SESION_CRONO)
 
-            self._push_overlay()
+    def _terminar_crono(self, sesion=None):
+        """Publica la sesión como terminada. Devuelve la previa si seguía activa.
+
+        Con `sesion`, sólo termina si la actual sigue siendo esa.
+        """
+        with self._crono_lock:
+            previo = self._crono
+            if not previo.activo or (sesion is not None and previo is not sesion):
+                return None
+            self._crono = previo.terminada()
+            return previo
+
+    def _on_crono_tick(self, nombre, segs):
+        """Refresca las ventanas. Lee el valor actual del motor al enviar, así
+        un tick demorado o perdido no desfasa lo que ve el usuario."""
+        self._canal_main.campo("segs", self._segs_restantes())
+        self._canal_main.enviar()
+        self._push_overlay()
+
+    def _registrar_sesion(self, estado, resultado, restantes=None):
+        """Agrega la sesión terminada al historial (no toca el disco en este hilo).
+
+        `restantes` son los segundos que le quedaban; por defecto, los del motor.
+        """
+        if estado is None:
+            return
+        if restantes is None:
+            restantes = self._segs_restantes()
+        fin   = self._reloj.time()
+        usado = estado.segs_total - restantes
+        self._historial.registrar({
+            "ini":       round(estado.inicio, 1),
+            "fin":       round(fin, 1),
+            "dur":       estado.segs_total,
+            "usado":     usado,
+            "exceso":    max(0, int(fin - estado.inicio) - estado.segs_total),
+            "total":     estado.total,
+            "hechas":    estado.hechas,
+            "resultado": resultado,
+            "tareas":    [[t["texto"], int(t["done"])] for t in estado.tareas.a_json()],
+        })
+
+    def _on_crono_fin(self, nombre, sesion=None):
+        estado = self._terminar_crono(sesion)
+        if estado is None:
+            return
+        self._registrar_sesion(estado, "agotada")
+        if estado.hechas < estado.total:
+            self._notificador.enviar("⏰ ¡Tiempo agotado!", "No completaste todas las tareas.",
+                                     loop=False)
+            self._llamar_js(self._window, "window._cronoTiempoAgotado")
+        self._al_hilo_principal(self._ocultar_overlay)
+
+    # ═════════════════════════════════════════════════════════════════════════
+    #  AGENDA: excepciones con fecha (ver agenda.py)
+    # ═════════════════════════════════════════════════════════════════════════
+    def get_agenda(self, desde, hasta):
+        """Franjas efectivas de cada fecha entre `desde` y `hasta` ("YYYY-MM-DD")."""
+        try:
+            return dict(self._agenda.rango(desde, hasta), ok=True)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def get_excepciones(self):
+        return {"ok": True, "excepciones": self._agenda.listar()}
+
+    def crear_excepcion(self, nombre, desde, hasta=None, celdas=None, resto=None):
+        """Nueva capa: `celdas` es {"HH:MM": [titulo, mensaje]}; `resto` cubre las demás."""
+        try:
+            capa_id = self._agenda.agregar(nombre, desde, hasta, celdas, resto)
+            self._escritor.guardar(self._agenda.ruta, self._agenda.a_json)
+            return {"ok": True, "id": capa_id}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def borrar_excepcion(self, capa_id):
+        try:
+            if not self._agenda.borrar(capa_id):
+                return {"ok": False, "error": f"no existe la excepción {capa_id}"}
+            self._escritor.guardar(self._agenda.ruta, self._agenda.a_json)
+            return {"ok": True}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    # ═════════════════════════════════════════════════════════════════════════
+    #  HISTORIAL (ver historial.py)
+    # ═════════════════════════════════════════════════════════════════════════
+    def get_historial(self, dias=7):
+        """Totales por día de los últimos `dias`, de la semana actual y de siempre."""
+        return dict(self._historial.resumen(self._reloj.time(), int(dias)), ok=True)
 
-        if self._crono["activo"] and self._crono["segs_restantes"] <= 0:
-            self._crono["activo"] = False
-            todas = all(t.get("done", False) for t in self._crono["tareas"])
-            if not todas:
-                _toast("⏰ ¡Tiempo agotado!", "No completaste todas las tareas.", loop=False)
-                if self._window:
-                    try:
-                        self._window.evaluate_js(
-                            "window._cronoTiempoAgotado && window._cronoTiempoAgotado()"
-                        )
-                    except Exception:
-                        pass
-            _main_queue.put(self._destruir_overlay)
+    def get_sesiones(self, limite=20):
+        """Las últimas sesiones del cronómetro, más nuevas primero."""
+        return {"ok": True, "sesiones": self._historial.ultimas(int(limite))}
 
     # ═════════════════════════════════════════════════════════════════════════
     #  OVERLAY API (llamada desde overlay.html)
     # ═════════════════════════════════════════════════════════════════════════
     def overlay_get_estado(self):
-        tareas = self._crono["tareas"]
-        hechas = sum(1 for t in tareas if t.get("done", False))
+        # Con el lock de escritura: ningún cambio queda entre la foto y la base
+        with self._crono_lock:
+            crono  = self._crono
+            estado = self._estado_overlay(crono)
+            estado["segs_restantes"] = self._segs_restantes()
+            estado["segs_total"]     = crono.segs_total
+            # Lo que el overlay acaba de leer pasa a ser la base de los parches
+            estado["v"]              = self._canal_overlay.sincronizado(estado)
+        return estado
+
+    def overlay_get_tareas(self, desde=0, cantidad=PAGINA_OVERLAY):
+        """Página de tareas pendientes con id >= `desde` (ver tareas.py)."""
+        tareas, siguiente = self._crono.tareas.pagina(desde, int(cantidad))
+        return {"ok": True, "tareas": tareas, "siguiente": siguiente}
+
+    def _estado_overlay(self, crono=None):
+        """Contadores y la primera página de pendientes; nunca la lista entera."""
+        if crono is None:
+            crono = self._crono
+        # Una sola lectura: contadores y página son de la misma versión
+        hechas, total, tareas, siguiente = crono.tareas.foto(PAGINA_OVERLAY)
         return {
-            "segs_restantes": self._crono["segs_restantes"],
-            "segs_total":     self._crono["segs_total"],
-            "hechas":         hechas,
-            "total":          len(tareas),
-            "tareas":         tareas,
-            "tema":           self.config.get("tema", "dark"),
+            "hechas":    hechas,
+            "total":     total,
+            "tareas":    tareas,
+            "siguiente": siguiente,
+            "tema":      self.config.get("tema", "dark"),
         }
 
     def overlay_restaurar_app(self):
         if self._window:
             try:
                 self._window.restore()
-            except Exception:
-                pass
+            except Exception as e:
+                self._metricas.error("overlay_restaurar_app", e)
         return {"ok": True}
 
     def overlay_cerrar(self):
-        """El usuario cerró el overlay manualmente desde el botón ✕."""
-        _main_queue.put(self._destruir_overlay)
+        """El usuario cerró el overlay desde el botón ✕: se oculta, no se destruye."""
+        self._al_hilo_principal(self._ocultar_overlay)
         return {"ok": True}
 
     def overlay_set_height(self, height):
         """Redimensiona la ventana overlay al colapsar/expandir."""
-        ov = self._overlay_win
+        ov = self._overlay.ventana
         if ov is None:
             return {"ok": False}
         def _resize():
@@ -348,14 +705,15 @@ class AdviserAPI:
                 # Usar el ancho actual de la ventana en lugar de hardcodear 200
                 ov.resize(ov.width, int(height))
             except Exception as e:
+                self._metricas.error("overlay_resize", e)
                 print(f"[Adviser] Error resize overlay: {e}")
-        _main_queue.put(_resize)
+        self._al_hilo_principal(_resize, clave=("resize", id(ov)))
         return {"ok": True}
     
     
     def overlay_resize(self, width, height):
         """Redimensiona el overlay por arrastre del handle. Llamado desde overlay.html."""
-        ov = self._overlay_win
+        ov = self._overlay.ventana
         if ov is None:
             return {"ok": False}
         w = max(200, int(width))
@@ -364,8 +722,10 @@ class AdviserAPI:
             try:
                 ov.resize(w, h)
             except Exception as e:
+                self._metricas.error("overlay_resize", e)
                 print(f"[Adviser] Error resize overlay: {e}")
-        _main_queue.put(_resize)
+        # Sólo el último tamaño pendiente por ventana llega a ejecutarse
+        self._al_hilo_principal(_resize, clave=("resize", id(ov)))
         return {"ok": True}
     
 
@@ -373,150 +733,308 @@ class AdviserAPI:
 
 
     # ═════════════════════════════════════════════════════════════════════════
-    #  DETECCIÓN DE ESTADO DE VENTANA (polling via win32gui)
+    #  MÉTRICAS (ver metricas.py)
     # ═════════════════════════════════════════════════════════════════════════
-    def iniciar_monitor_ventana(self):
-        """Lanza un hilo que detecta minimizar/restaurar via win32gui."""
-        t = threading.Thread(target=self._poll_ventana, daemon=True)
-        t.start()
-
-    def _poll_ventana(self):
-        """Polling cada 500ms del estado real de la ventana via win32gui."""
-        prev_minimized = False
-        print("[Adviser] Monitor de ventana iniciado.")
-
-        while not self._window_closing:
-            time.sleep(0.5)
-            try:
-                is_min = self._es_ventana_minimizada()
-            except Exception as e:
-                print(f"[Adviser] Error en poll: {e}")
-                continue
+    def get_metricas(self):
+        """Histogramas del bridge y de evaluate_js, errores, colas e hilos."""
+        return dict(self._metricas.instantanea(), ok=True)
+
+    def _registrar_medidores(self):
+        m = self._metricas
+        m.medidor("main_queue", _main_queue.estadisticas)
+        m.medidor("hilos", hilos)
+        m.medidor("notificaciones", self._notificador.estadisticas)
+        m.medidor("escritor", lambda: {
+            "pendientes": self._escritor.pendientes(),
+            "pedidos":    self._escritor.pedidos,
+            "escrituras": self._escritor.escrituras,
+            "errores":    self._escritor.errores,
+        })
+        m.medidor("planificador", lambda: {
+            "despertares": self._planificador.despertares,
+            "ejecutadas":  self._planificador.ejecutadas,
+        })
+        m.medidor("canales", lambda: {
+            "main":    {"enviados": self._canal_main.enviados, "omitidos": self._canal_main.omitidos},
+            "overlay": {"enviados": self._canal_overlay.enviados,
+                        "omitidos": self._canal_overlay.omitidos},
+        })
+
+    def _programar_volcado_metricas(self):
+        """Con `"metricas_cada": N` en config.json escribe metricas.json cada N segundos."""
+        cada = self.config.get("metricas_cada", 0)
+        if not cada:
+            return
+        ruta = os.path.join(self._carpeta, "metricas.json")
+        def _volcar():
+            self._escritor.guardar(ruta, self._metricas.instantanea)
+            self._planificador.programar_en("metricas", cada, _volcar)
+        self._planificador.programar_en("metricas", cada, _volcar)
+
+    def _llamar_js(self, ventana, funcion, *args):
+        """evaluate_js de una función global, medido y sin cortar el flujo."""
+        if ventana is None:
+            return
+        params = ", ".join(json.dumps(a) for a in args)
+        t0 = time.perf_counter()
+        try:
+            ventana.evaluate_js(f"{funcion} && {funcion}({params})")
+        except Exception as e:
+            self._metricas.error(f"js.{funcion}", e)
+        finally:
+            self._metricas.observar(f"js.{funcion}", time.perf_counter() - t0)
 
-            if is_min == prev_minimized:
-                continue
+    # ═════════════════════════════════════════════════════════════════════════
+    #  COMANDOS DE LA CLI (ver instancia.py)
+    # ═════════════════════════════════════════════════════════════════════════
+    def _atender_comando(self, cmd, args):
+        """Responde un comando que llegó por el canal local de la instancia."""
+        t0 = time.perf_counter()
+        try:
+            if cmd == "ping":
+                return {"ok": True, "pid": os.getpid()}
+            if cmd == "now":
+                return self._franja_cli(self._reloj.ahora())
+            if cmd == "next":
+                return self._franja_cli(self._agenda.proxima(self._reloj.ahora())[0])
+            if cmd == "mostrar":
+                if self._headless:
+                    return {"ok": False, "error": "modo headless: no hay ventana que mostrar"}
+                self._al_hilo_principal(self._mostrar_ventana)
+                return {"ok": True}
+            if cmd == "crono":
+                return self._comando_crono(args)
+            return {"ok": False, "error": f"comando desconocido: {cmd}"}
+        finally:
+            self._metricas.observar(f"ipc.{cmd}", time.perf_counter() - t0)
+
+    def _franja_cli(self, momento):
+        slot = indice_slot(momento, self._slot_minutos())
+        dia  = DIAS[momento.weekday()]
+        titulo, mensaje = self._agenda.celda(momento, slot)
+        desde = slot * self._slot_minutos()
+        return {
+            "ok":      True,
+            "fecha":   momento.strftime("%Y-%m-%d"),
+            "dia":     dia,
+            "slot":    slot,
+            "inicio":  f"{desde // 60:02d}:{desde % 60:02d}",
+            "titulo":  titulo,
+            "mensaje": mensaje,
+        }
 
-            prev_minimized = is_min
-            print(f"[Adviser] Estado ventana → {'MINIMIZADA' if is_min else 'RESTAURADA'}")
+    def _comando_crono(self, args):
+        accion = args[0] if args else "estado"
+        if accion == "start":
+            try:
+                segs = int(args[1])
+            except (IndexError, TypeError, ValueError):
+                segs = 0
+            if segs <= 0:
+                return {"ok": False, "error": "uso: crono start <segundos> [tareas…]"}
+            textos = args[2:] or ["Sesión desde la línea de comandos"]
+            res    = self.crono_iniciar([{"texto": t, "done": False} for t in textos], segs)
+            # La ventana principal se entera como si lo hubiera iniciado el usuario
+            self._llamar_js(self._window, "window._onCronoExterno", {
+                "segs": segs, "v": res["v"], "ids": res["ids"], "tareas": textos})
+            return {"ok": True, "segs": segs, "tareas": len(textos)}
+        if accion in ("pause", "resume"):
+            res = self.crono_pausar() if accion == "pause" else self.crono_reanudar()
+            if res["ok"]:
+                self._llamar_js(self._window, "window._onCronoExternoAccion", {
+                    "accion": accion, "segs": self._segs_restantes()})
+            return res
+        if accion == "stop":
+            activo = self._crono.activo
+            res    = self.crono_cancelar()
+            if activo:
+                self._llamar_js(self._window, "window._onCronoExternoAccion", {"accion": "stop"})
+            return res
+        if accion == "estado":
+            crono = self._crono
+            hechas, total, _, _ = crono.tareas.foto(0)
+            return {
+                "ok":        True,
+                "activo":    crono.activo,
+                "pausado":   self._motor.pausada(SESION_CRONO),
+                "restantes": self._segs_restantes(),
+                "hechas":    hechas,
+                "total":     total,
+            }
+        return {"ok": False, "error": f"acción de crono desconocida: {accion}"}
+
+    def _mostrar_ventana(self):
+        """Trae la ventana principal al frente. SOLO desde el hilo principal."""
+        if self._window is None:
+            return
+        try:
+            self._window.restore()
+            self._window.show()
+        except Exception as e:
+            self._metricas.error("mostrar_ventana", e)
 
-            if is_min:
-                self._window_minimized = True
-                # Overlay cronómetro
-                if self._crono["activo"]:
-                    _main_queue.put(self._crear_overlay)
-            else:
-                self._window_minimized = False
-                _main_queue.put(self._destruir_overlay)
+    # ═════════════════════════════════════════════════════════════════════════
+    #  DETECCIÓN DE ESTADO DE VENTANA (ver estado_ventana.py)
+    # ═════════════════════════════════════════════════════════════════════════
+    def iniciar_monitor_ventana(self, proveedor=None):
+        """Empieza a escuchar minimizar/restaurar de la ventana principal.
+        Por defecto usa los eventos de pywebview; `"monitor_ventana": "polling"`
+        en config.json fuerza el polling Win32."""
+        if self._monitor is not None:
+            return
+        self._monitor = proveedor or crear_proveedor(
+            self._window, self.config.get("monitor_ventana", "eventos"))
+        self._monitor.iniciar(self._on_estado_ventana)
 
-    def _es_ventana_minimizada(self):
-        """Devuelve True si la ventana principal está minimizada.
-        Usa win32gui si está disponible, si no cae a ctypes puro.
-        """
-        if self._window is None:
-            return False
-        if _WIN32_AVAILABLE:
-            try:
-                hwnd = win32gui.FindWindow(None, "Adviser")
-                if not hwnd:
-                    return False
-                placement = win32gui.GetWindowPlacement(hwnd)
-                return placement[1] == win32con.SW_SHOWMINIMIZED
-            except Exception:
-                pass
-        # Fallback ctypes (siempre disponible en Windows)
-        return _esta_minimizada_ctypes("Adviser")
-
-    # Mantener estos handlers para compatibilidad (pywebview los llama igual)
-    def on_main_minimized(self):
-        pass  # reemplazado por polling
+    def _on_estado_ventana(self, is_min):
+        if self._window_closing:
+            return
+        print(f"[Adviser] Estado ventana → {'MINIMIZADA' if is_min else 'RESTAURADA'}")
+
+        if is_min:
+            self._window_minimized = True
+            # Overlay cronómetro
+            if self._crono.activo:
+                self._al_hilo_principal(self._mostrar_overlay)
+        else:
+            self._window_minimized = False
+            self._al_hilo_principal(self._ocultar_overlay)
 
     def on_main_closed(self):
         self._window_closing   = True
         self._window_minimized = False
-
-    def on_main_restored(self):
-        pass  # reemplazado por polling
+        if self._monitor is not None:
+            self._monitor.detener()
+        if self._vigilante is not None:
+            self._vigilante.detener()
+        # El overlay oculto mantendría viva a pywebview
+        self._al_hilo_principal(self._destruir_overlay)
+        self._escritor.vaciar()
 
     # ═════════════════════════════════════════════════════════════════════════
     #  HELPERS QUE DEBEN CORRER EN EL HILO PRINCIPAL
     # ═════════════════════════════════════════════════════════════════════════
-    def _crear_overlay(self):
-        """Crea la ventana overlay. SOLO llamar desde el hilo principal."""
-        if self._overlay_open:
+    def _preparar_overlay(self):
+        """Crea el overlay oculto para tenerlo listo. SOLO desde el hilo principal."""
+        try:
+            self._overlay.preparar()
+        except Exception as e:
+            self._metricas.error("preparar_overlay", e)
+            print(f"[Adviser] Error al preparar overlay: {e}")
+
+    def _mostrar_overlay(self):
+        """Muestra el overlay (lo crea si hiciera falta). SOLO desde el hilo principal."""
+        if self._overlay.visible:
             return
+        t0 = time.perf_counter()
         try:
-            ov = webview.create_window(
-                title            = "Adviser · Cronómetro",
-                url              = RUTA_OVERLAY,
-                js_api           = self,
-                width            = 250,
-                height           = 150,
-                resizable        = True,
-                frameless        = True,
-                on_top           = True,
-                background_color = "#0D1018",
-            )
-            self._overlay_win  = ov
-            self._overlay_open = True
- 
-            # Limpiar estado cuando el overlay se cierra.
-            def _on_overlay_closed():
-                self._overlay_win  = None
-                self._overlay_open = False
-                print("[Adviser] Overlay cerrado.")
- 
-            ov.events.closed += _on_overlay_closed
- 
+            self._overlay.mostrar()
+            # Mientras estuvo oculto no recibió parches: va el estado entero
+            self._canal_overlay.invalidar()
+            self._push_overlay()
             print("[Adviser] Overlay abierto.")
         except Exception as e:
-            print(f"[Adviser] Error al crear overlay: {e}")
+            self._metricas.error("mostrar_overlay", e)
+            print(f"[Adviser] Error al mostrar overlay: {e}")
+        finally:
+            self._metricas.observar("overlay.mostrar", time.perf_counter() - t0)
+
+    def _ocultar_overlay(self):
+        """Oculta el overlay sin destruirlo. SOLO desde el hilo principal."""
+        if not self._overlay.visible:
+            return
+        try:
+            self._overlay.ocultar()
+            print("[Adviser] Overlay cerrado.")
+        except Exception as e:
+            self._metricas.error("ocultar_overlay", e)
+            print(f"[Adviser] Error al cerrar overlay: {e}")
 
     def _destruir_overlay(self):
-        """Destruye la ventana overlay. SOLO llamar desde el hilo principal."""
-        if self._overlay_win is not None:
-            try:
-                self._overlay_win.destroy()
-                print("[Adviser] Overlay cerrado.")
-            except Exception as e:
-                print(f"[Adviser] Error al cerrar overlay: {e}")
-        self._overlay_win  = None
-        self._overlay_open = False
+        """Cierra el overlay de verdad (al salir). SOLO desde el hilo principal."""
+        try:
+            self._overlay.destruir()
+        except Exception as e:
+            self._metricas.error("destruir_overlay", e)
 
-    def _push_overlay(self):
-        """Envía tick al overlay. Puede llamarse desde cualquier hilo."""
-        ov = self._overlay_win
-        if ov is None:
+    def _al_hilo_principal(self, fn, clave=None):
+        """Encola `fn` para el hilo principal. En modo headless nadie atiende
+        la cola (no hay ventanas): no se encola nada."""
+        if self._headless:
             return
-        try:
-            segs   = self._crono["segs_restantes"]
-            tareas = self._crono["tareas"]
-            hechas = sum(1 for t in tareas if t.get("done", False))
-            total  = len(tareas)
-            tareas_json = json.dumps(tareas)
-            ov.evaluate_js(
-                f"window._ovTick && window._ovTick({segs}, {hechas}, {total}, {tareas_json})"
-            )
-        except Exception:
-            pass
-
-
-# ─── Loop del hilo principal (drena la cola) ──────────────────────────────────
+        _main_queue.enviar(fn, clave=clave)
+
+    def _push_overlay(self):
+        """Envía al overlay lo que cambió. Puede llamarse desde cualquier hilo."""
+        self._canal_overlay.enviar()
+
+    def _agendar_push_overlay(self):
+        """Los cambios de tareas no se envían en el momento: el primero agenda
+        un envío en el hilo de ticks y los que llegan antes de que salga viajan
+        en el mismo parche. Con la sesión corriendo, el tick de cada segundo
+        también vacía lo acumulado."""
+        plan = self._motor.planificador
+        if plan.pendiente("push-overlay") is None:
+            plan.programar_en("push-overlay", PUSH_OVERLAY, self._push_overlay)
+
+
+# ─── Loop del hilo principal (atiende el despachador) ─────────────────────────
 def _main_loop(api):
     """
     Se pasa como `func` a webview.start(). Corre en el hilo principal de pywebview,
     lo que hace seguro llamar create_window() y destroy() desde aquí.
     """
-    while True:
-        time.sleep(0.2)
-        _drain_queue()
+    hilo = threading.current_thread()
+    if hilo is not threading.main_thread():
+        hilo.name = "adviser-despachador"     # así aparece en métricas y perfiles
+    _main_queue.ejecutar()
 
 
 # ─── Entry point ──────────────────────────────────────────────────────────────
-if __name__ == "__main__":
+def _tomar_instancia():
+    """Lock de instancia única. None si ya hay otra corriendo (y se le avisa)."""
+    # multiprocessing.connection sólo hace falta al arrancar la app
+    from instancia import Instancia, enviar as enviar_a_instancia
+    instancia = Instancia(_app_path)
+    if instancia.adquirir():
+        return instancia
+    print("[Adviser] Ya hay una instancia abierta; se la trae al frente.")
+    res = enviar_a_instancia(_app_path, "mostrar")
+    if res is not None and not res.get("ok"):
+        print(f"[Adviser] {res.get('error')}")
+    return None
+
+
+def _iniciar_perfilador(api, hz=None):
+    """Perfilador por muestreo si lo pide --perfil o config.json (ver perfilador.py)."""
+    if hz is None and not api.config.get("perfilador"):
+        return None     # apagado: ni se importa
+    from perfilador import desde_config
+    perfilador = desde_config(api.config.get("perfilador"), hz)
+    perfilador.iniciar()
+    return perfilador
+
+
+def _terminar_perfilador(perfilador):
+    if perfilador is None:
+        return
+    perfilador.detener()
+    try:
+        perfilador.escribir(_app_path)
+    except OSError as e:
+        print(f"[Adviser] No se pudo guardar el perfil: {e}")
+
+
+def main(perfil=None):
+    instancia = _tomar_instancia()
+    if instancia is None:
+        return
+    webview = _webview()
     api    = AdviserAPI()
+    instancia.servir(api._atender_comando)
+    perfilador = _iniciar_perfilador(api, perfil)
     window = webview.create_window(
         title            = "Adviser",
-        url              = RUTA_HTML,
         js_api           = api,
         width            = 960,
         height           = 680,
@@ -524,18 +1042,58 @@ if __name__ == "__main__":
         frameless        = False,
         resizable        = True,
         background_color = "#080A0F",
+        **_pagina_web("ui.html"),
     )
     api._window = window
 
-    window.events.minimized += api.on_main_minimized
-    window.events.restored  += api.on_main_restored
     window.events.closed    += api.on_main_closed
 
-    # Arrancar monitor de ventana (polling win32gui) una vez que webview esté listo
+    # Arrancar monitor de ventana una vez que webview esté listo
     def _on_loaded():
         api.iniciar_monitor_ventana()
+        api.iniciar_recarga_rutina()
+        # El overlay queda creado y oculto: minimizar sólo lo muestra
+        _main_queue.enviar(api._preparar_overlay)
 
     window.events.loaded += _on_loaded
 
     # func= corre en el hilo principal → puede crear/destruir ventanas de forma segura
     webview.start(_main_loop, api, debug=False)
+    # _main_loop sigue bloqueado en el despachador (pywebview lo corre en un
+    # hilo que no es daemon): sin esto el proceso no termina al cerrar
+    _main_queue.detener()
+
+    # Lo que haya quedado pendiente de guardar se escribe antes de salir
+    _terminar_perfilador(perfilador)
+    instancia.cerrar()
+    api._escritor.vaciar()
+    api._notificador.vaciar(timeout=2.0)
+
+
+def ejecutar_headless(perfil=None):
+    """Sólo el asistente y las notificaciones, sin ventanas. Corre hasta Ctrl+C."""
+    instancia = _tomar_instancia()
+    if instancia is None:
+        return
+    api = AdviserAPI(headless=True)
+    instancia.servir(api._atender_comando)
+    perfilador = _iniciar_perfilador(api, perfil)
+    api.iniciar_recarga_rutina()
+    api.toggle_asistente()
+    print(f"[Adviser] Modo headless: asistente activo "
+          f"(notificaciones: {api._notificador.backend.nombre}). Ctrl+C para salir.")
+    try:
+        while True:
+            # El trabajo lo hacen los hilos del planificador; esto sólo espera
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _terminar_perfilador(perfilador)
+        instancia.cerrar()
+        api._escritor.vaciar()
+        api._notificador.vaciar(timeout=2.0)
+
+
+if __name__ == "__main__":
+    main()
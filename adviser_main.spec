@@ -1,16 +1,21 @@
 # adviser.spec
 import os
+import sys
 block_cipher = None
 
+# ui.html, overlay.html, style.css y script.js no viajan sueltos: se minifican
+# y se meten en _bundle_web.py, que va compilado dentro del PYZ y se sirve
+# desde memoria (ver empaquetar.py). Se regenera en cada build.
+sys.path.insert(0, SPECPATH)
+import empaquetar
+for _pagina, (_antes, _despues) in empaquetar.construir(SPECPATH).items():
+    print(f"[Adviser] {_pagina}: {_antes / 1024:.1f} KB → {_despues / 1024:.1f} KB")
+
 a = Analysis(
     ['adviser_main.py'],
     pathex=[],
     binaries=[],
     datas=[
-        ('ui.html',             '.'),
-        ('overlay.html',        '.'),   # ← tu overlay nuevo
-        ('style.css',           '.'),
-        ('script.js',           '.'),
         ('icon.png',            '.'),
         ('rutina.json',         '.'),
         ('config.json',         '.'),
@@ -20,6 +25,7 @@ a = Analysis(
         'webview.platforms.winforms',
         'winotify',
         'clr',
+        '_bundle_web',
     ],
     hookspath=[],
     hooksconfig={},
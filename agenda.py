@@ -0,0 +1,230 @@
+import json
+import threading
+from bisect import bisect_right
+from datetime import date, datetime
+
+from planificador import proximo_limite, indice_slot
+from rutina import DIAS, par
+
+# ─── Agenda: la rutina semanal más excepciones con fecha ─────────────────────
+# Una excepción ("capa") cubre un rango de fechas y pisa algunas franjas de la
+# plantilla semanal: un día de examen, un feriado, una semana de viaje.
+#
+#   {"id": 3, "nombre": "Examen", "desde": "2026-11-03", "hasta": "2026-11-03",
+#    "celdas": {"09:00": ["Examen final", "Aula 4"]}, "resto": null}
+#
+# Las celdas se guardan por hora de inicio ("HH:MM"), así que siguen valiendo
+# si cambia la granularidad de la rutina. `resto`, si está, se usa para todas
+# las franjas que la capa no nombra (p. ej. un feriado entero). Si dos capas
+# se pisan gana la creada después.
+#
+# Las capas se indexan por intervalo de fechas: buscar las que tocan un rango
+# cuesta O(log n + k) para k resultados, sin recorrer todas.
+
+
+def _ordinal(fecha):
+    if isinstance(fecha, datetime):
+        return fecha.date().toordinal()
+    if isinstance(fecha, date):
+        return fecha.toordinal()
+    return date.fromisoformat(str(fecha)[:10]).toordinal()
+
+
+class IndiceIntervalos:
+    """Intervalos cerrados (inicio, fin, valor) ordenados por inicio.
+
+    El arreglo ordenado se recorre como un árbol binario implícito (la raíz de
+    [lo, hi) es el medio) y cada raíz guarda el mayor `fin` de su rango, así se
+    podan las ramas que terminan antes de lo pedido. Se reconstruye entero al
+    cambiar: las capas cambian poco y se leen mucho.
+    """
+
+    def __init__(self, intervalos=()):
+        self._items   = sorted(intervalos, key=lambda t: (t[0], t[1]))
+        self._inicios = [t[0] for t in self._items]
+        self._max_fin = [0] * len(self._items)
+        self._aumentar(0, len(self._items))
+
+    def _aumentar(self, lo, hi):
+        if lo >= hi:
+            return -1
+        medio = (lo + hi) // 2
+        self._max_fin[medio] = max(self._items[medio][1],
+                                   self._aumentar(lo, medio),
+                                   self._aumentar(medio + 1, hi))
+        return self._max_fin[medio]
+
+    def __len__(self):
+        return len(self._items)
+
+    def solapados(self, desde, hasta):
+        """Valores de los intervalos que tocan [desde, hasta], en orden de inicio."""
+        limite = bisect_right(self._inicios, hasta)     # los que empiezan a tiempo
+        encontrados = []
+        pila = [(0, len(self._items))]
+        # Recorrido en orden con pila: (lo, hi) por explorar, o (i, None) a emitir
+        while pila:
+            lo, hi = pila.pop()
+            if hi is None:
+                encontrados.append(self._items[lo][2])
+                continue
+            if lo >= hi or lo >= limite:
+                continue
+            medio = (lo + hi) // 2
+            if self._max_fin[medio] < desde:
+                continue
+            pila.append((medio + 1, hi))
+            if medio < limite and self._items[medio][1] >= desde:
+                pila.append((medio, None))
+            pila.append((lo, medio))
+        return encontrados
+
+    def en(self, dia):
+        return self.solapados(dia, dia)
+
+
+class Agenda:
+    def __init__(self, ruta, rutina):
+        """
+        ruta   -- excepciones.json
+        rutina -- callable que devuelve la Rutina activa (cambia con el perfil)
+        """
+        self.ruta    = ruta
+        self._rutina = rutina
+        self._lock   = threading.Lock()
+        self._capas  = []
+        self._indice = IndiceIntervalos()
+        self._cargar()
+
+    # ── Carga / guardado ─────────────────────────────────────────────────────
+    def _cargar(self):
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+            capas = [self._normalizar(c) for c in datos.get("capas", [])]
+        except FileNotFoundError:
+            capas = []
+        except Exception as e:
+            print(f"[Adviser] excepciones.json ilegible, se ignora: {e}")
+            capas = []
+        with self._lock:
+            self._capas = capas
+            self._reindexar()
+
+    def a_json(self):
+        with self._lock:
+            return {"capas": [dict(c, celdas={h: list(v) for h, v in c["celdas"].items()},
+                                   resto=list(c["resto"]) if c["resto"] else None)
+                              for c in self._capas]}
+
+    @staticmethod
+    def _normalizar(capa):
+        desde = date.fromisoformat(str(capa["desde"])[:10])
+        hasta = date.fromisoformat(str(capa.get("hasta") or capa["desde"])[:10])
+        if hasta < desde:
+            raise ValueError("la excepción termina antes de empezar")
+        celdas = {}
+        for hora, celda in (capa.get("celdas") or {}).items():
+            h, m = (int(x) for x in str(hora).split(":"))
+            if not (0 <= h < 24 and 0 <= m < 60):
+                raise ValueError(f"hora inválida: {hora}")
+            celdas[f"{h:02d}:{m:02d}"] = par(celda[0], celda[1])
+        resto = capa.get("resto")
+        return {
+            "id":     int(capa["id"]),
+            "nombre": str(capa.get("nombre", "")),
+            "desde":  desde.isoformat(),
+            "hasta":  hasta.isoformat(),
+            "celdas": celdas,
+            "resto":  par(resto[0], resto[1]) if resto else None,
+        }
+
+    def _reindexar(self):
+        # La posición en la lista es la prioridad (la última creada gana)
+        self._indice = IndiceIntervalos(
+            (_ordinal(c["desde"]), _ordinal(c["hasta"]), (prio, c))
+            for prio, c in enumerate(self._capas))
+
+    # ── Cambios ──────────────────────────────────────────────────────────────
+    def listar(self):
+        return self.a_json()["capas"]
+
+    def agregar(self, nombre, desde, hasta, celdas=None, resto=None):
+        with self._lock:
+            nuevo_id = max((c["id"] for c in self._capas), default=0) + 1
+            capa = self._normalizar({"id": nuevo_id, "nombre": nombre, "desde": desde,
+                                     "hasta": hasta, "celdas": celdas, "resto": resto})
+            self._capas.append(capa)
+            self._reindexar()
+            return capa["id"]
+
+    def borrar(self, capa_id):
+        with self._lock:
+            antes = len(self._capas)
+            self._capas = [c for c in self._capas if c["id"] != int(capa_id)]
+            self._reindexar()
+            return len(self._capas) != antes
+
+    # ── Consultas ────────────────────────────────────────────────────────────
+    def _capas_del_dia(self, dia_ordinal):
+        return [c for _, c in sorted(self._indice.en(dia_ordinal), key=lambda t: t[0])]
+
+    def _resolver(self, capas, rutina, dia, slot):
+        """Celda efectiva de una franja: la capa más nueva que la nombra, si no
+        el `resto` de la más nueva que lo tenga, si no la plantilla."""
+        if capas:
+            m = slot * rutina.slot_minutos
+            hora = f"{m // 60:02d}:{m % 60:02d}"
+            for capa in reversed(capas):
+                if hora in capa["celdas"]:
+                    return capa["celdas"][hora], capa
+            for capa in reversed(capas):
+                if capa["resto"]:
+                    return capa["resto"], capa
+        return rutina.celda(dia, slot), None
+
+    def celda(self, momento, slot=None):
+        """(título, mensaje) efectivos para la fecha y franja de `momento`."""
+        rutina = self._rutina()
+        if slot is None:
+            slot = indice_slot(momento, rutina.slot_minutos)
+        capas = self._capas_del_dia(_ordinal(momento))
+        return self._resolver(capas, rutina, momento.weekday(), slot)[0]
+
+    def proxima(self, momento):
+        """Próximo inicio de franja posterior a `momento` y su celda efectiva."""
+        rutina = self._rutina()
+        limite = proximo_limite(momento, rutina.slot_minutos)
+        slot   = indice_slot(limite, rutina.slot_minutos)
+        return limite, slot, self.celda(limite, slot)
+
+    def rango(self, desde, hasta):
+        """Franjas efectivas de cada fecha entre `desde` y `hasta` (inclusive).
+
+        Se consulta el índice una sola vez para todo el rango; el costo crece
+        con la cantidad de días devueltos y de capas que los tocan.
+        """
+        rutina = self._rutina()
+        a, b = _ordinal(desde), _ordinal(hasta)
+        if b < a:
+            raise ValueError("el rango termina antes de empezar")
+        activas = [(_ordinal(c["desde"]), _ordinal(c["hasta"]), c)
+                   for _, c in sorted(self._indice.solapados(a, b), key=lambda t: t[0])]
+        dias = []
+        for o in range(a, b + 1):
+            capas = [c for ini, fin, c in activas if ini <= o <= fin]
+            fecha = date.fromordinal(o)
+            slots, cambiadas = [], []
+            for slot in range(rutina.slots):
+                celda, capa = self._resolver(capas, rutina, fecha.weekday(), slot)
+                slots.append(list(celda))
+                if capa is not None:
+                    cambiadas.append(slot)
+            dias.append({
+                "fecha":       fecha.isoformat(),
+                "dia":         DIAS[fecha.weekday()],
+                "excepciones": [c["nombre"] for c in capas],
+                "cambiadas":   cambiadas,
+                "slots":       slots,
+            })
+        return {"slot_minutos": rutina.slot_minutos, "dias": dias}
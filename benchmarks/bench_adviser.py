@@ -0,0 +1,418 @@
+"""Benchmarks de los caminos calientes de Adviser (sin GUI, corre en Linux).
+
+Maneja AdviserAPI con ventanas falsas (falsos.py), un notificador en memoria
+y una carpeta temporal, así que no toca rutina.json ni config.json reales.
+
+Uso:
+    python benchmarks/bench_adviser.py                       # todo, guarda el JSON
+    python benchmarks/bench_adviser.py --rapido              # tamaños chicos
+    python benchmarks/bench_adviser.py -s base.json          # elegir el archivo
+    python benchmarks/bench_adviser.py --comparar base.json  # diferencias contra otro
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import adviser_main
+from adviser_main import AdviserAPI, guardar_json
+from cronometro import MotorCronometro
+from despachador import resumen_ms
+from falsos import VentanaFalsa
+from notificaciones import Notificador, BackendMemoria
+from overlay_ventana import OverlayFalso
+from planificador import RelojFalso
+from rutina import DIAS
+
+CARPETA_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+
+# ─── Helpers ─────────────────────────────────────────────────────────────────
+def _medir(fn, repeticiones):
+    """Corre `fn` varias veces y devuelve el resumen en ms de cada llamada."""
+    muestras = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn()
+        muestras.append(time.perf_counter() - t0)
+    return resumen_ms(muestras)
+
+
+class _Entorno:
+    """Una AdviserAPI sobre una carpeta temporal con reloj y avisos falsos."""
+
+    def __init__(self, config=None, reloj=None):
+        self.carpeta = tempfile.mkdtemp(prefix="adviser-bench-")
+        if config:
+            guardar_json(os.path.join(self.carpeta, "config.json"), config)
+        self.backend = BackendMemoria()
+        self.api = AdviserAPI(
+            reloj       = reloj or RelojFalso(),
+            carpeta     = self.carpeta,
+            notificador = Notificador(self.backend, coalescencia=0),
+            overlay     = OverlayFalso(),
+        )
+        self.api._window = VentanaFalsa()
+
+    def cerrar(self):
+        self.api._motor.planificador.detener()
+        self.api._planificador.detener()
+        self.api._escritor.planificador.detener()
+        self.api._notificador.detener()
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+
+def _rutina_variada(slots):
+    """Una semana con textos distintos en cada franja (el peor caso para el JSON)."""
+    return {dia: [[f"Actividad {d}-{s}", f"Detalle de la franja {s} del {dia}"]
+                  for s in range(slots)]
+            for d, dia in enumerate(DIAS)}
+
+
+# ─── Cronómetro ──────────────────────────────────────────────────────────────
+def bench_crono_deriva(rapido):
+    """Deriva del cronómetro en sesiones largas.
+
+    Simulada: el reloj avanza a saltos irregulares (ticks tardíos y una
+    suspensión de 10 min) y se compara lo que muestra el motor con lo que
+    debería mostrar. `deriva_contador_s` es lo que habría derivado un contador
+    que resta 1 por despertar, como el viejo _loop_crono.
+
+    Real: una sesión corta con RelojReal a través de AdviserAPI; mide cuánto
+    tarde llega cada tick respecto del cambio de segundo.
+    """
+    resultados = {}
+    rng = random.Random(7)
+    for minutos in ([25, 120] if rapido else [25, 120, 480]):
+        total = minutos * 60
+        reloj = RelojFalso()
+        motor = MotorCronometro(reloj, hilo=False)
+        ticks = []
+        fin   = []
+        motor.iniciar("bench", total, on_tick=lambda n, s: ticks.append(s),
+                      on_fin=lambda n: fin.append(reloj.monotonic()))
+        transcurrido = 0.0
+        contador     = total
+        max_error    = 0
+        suspendido   = False
+        while not fin:
+            paso = rng.uniform(0.9, 1.6)
+            if not suspendido and transcurrido >= total / 2:
+                paso, suspendido = 600.0, True
+            reloj.avanzar(paso)
+            transcurrido += paso
+            contador -= 1
+            motor.planificador.ejecutar_pendientes()
+            esperado = max(0, total - int(transcurrido))
+            if motor.activa("bench"):
+                max_error = max(max_error, abs(motor.restantes("bench") - esperado))
+        resultados[f"simulada_{minutos}min"] = {
+            "ticks":             len(ticks),
+            "max_error_s":       max_error,
+            "fin_retraso_s":     round(fin[0] - total, 3),
+            "deriva_contador_s": round(abs(max(0, contador) - max(0, total - transcurrido)), 1),
+        }
+
+    segs = 2 if rapido else 5
+    e = _Entorno(reloj=adviser_main.RelojReal())
+    try:
+        api     = e.api
+        tardes  = []
+        fin     = threading.Event()
+        t0      = [0.0]
+        on_tick = api._on_crono_tick
+        def _tick(nombre, restantes):
+            tardes.append(max(0.0, time.monotonic() - (t0[0] + segs - restantes)))
+            on_tick(nombre, restantes)
+            if restantes <= 0:
+                fin.set()
+        api._on_crono_tick = _tick
+        t0[0] = time.monotonic()
+        api.crono_iniciar([{"texto": "bench", "done": False}], segs)
+        fin.wait(segs + 5)
+        resultados["real"] = {"segs": segs, "retraso_tick_ms": resumen_ms(tardes),
+                              "pushes_main": len(api._window.js)}
+    finally:
+        e.cerrar()
+    return resultados
+
+
+def bench_push_overlay(rapido):
+    """Costo de refrescar el overlay según la cantidad de tareas."""
+    resultados = {}
+    repeticiones = 200 if rapido else 1000
+    for n in ([10, 100, 1000] if rapido else [10, 100, 1000, 5000]):
+        e = _Entorno()
+        try:
+            api = e.api
+            tareas = [{"texto": f"Tarea {i}", "done": False} for i in range(n)]
+            api.crono_iniciar(tareas, 3600)
+            api._mostrar_overlay()
+            ov = api._overlay.ventana
+            t0 = time.perf_counter()
+            api.overlay_get_estado()
+            estado_ms = (time.perf_counter() - t0) * 1000
+
+            i = [0]
+            def _toggle():
+                idx = i[0] % n
+                api.crono_toggle_tarea(idx, (i[0] // n) % 2 == 0)
+                i[0] += 1
+            toggle = _medir(_toggle, repeticiones)
+            # Los toggles sólo se acumulan: sale un parche al vaciar
+            enviados = api._canal_overlay.enviados
+            api._push_overlay()
+            parches_toggle = api._canal_overlay.enviados - enviados
+            _toggle()
+            api._push_overlay()
+            bytes_toggle = len(ov.js[-1]) if ov.js else 0
+
+            tick = _medir(lambda: api._on_crono_tick(adviser_main.SESION_CRONO, 0), repeticiones)
+
+            def _completo():
+                api._canal_overlay.invalidar()
+                api._push_overlay()
+            completo = _medir(_completo, max(10, repeticiones // 10))
+            bytes_completo = len(ov.js[-1])
+
+            # Minimizar/restaurar: el overlay ya existe, sólo se muestra y oculta
+            def _mostrar():
+                api._ocultar_overlay()
+                api._mostrar_overlay()
+            mostrar = _medir(_mostrar, max(10, repeticiones // 10))
+
+            resultados[str(n)] = {
+                "overlay_get_estado_ms": round(estado_ms, 3),
+                "toggle_tarea_ms":       toggle,
+                "toggle_bytes":          bytes_toggle,
+                "toggle_parches":        parches_toggle,
+                "tick_ms":               tick,
+                "snapshot_ms":           completo,
+                "snapshot_bytes":        bytes_completo,
+                "mostrar_ms":            mostrar,
+                "creaciones":            api._overlay.creaciones,
+            }
+        finally:
+            e.cerrar()
+    return resultados
+
+
+# ─── Persistencia ────────────────────────────────────────────────────────────
+def bench_guardar(rapido):
+    """guardar_dia (lo que espera el bridge) y las escrituras reales a disco."""
+    resultados = {}
+    repeticiones = 50 if rapido else 200
+    for modo, config in (("snapshot", {}), ("diario", {"diario_rutina": True})):
+        e = _Entorno(config=config)
+        try:
+            api = e.api
+            i = [0]
+            def _guardar():
+                entradas = [[f"Bloque {i[0]}-{s}", "msg"] for s in range(24)]
+                api.guardar_dia(DIAS[i[0] % 7], entradas)
+                i[0] += 1
+            bridge = _medir(_guardar, repeticiones)
+            t0 = time.perf_counter()
+            api._escritor.vaciar()
+            vaciar_ms = (time.perf_counter() - t0) * 1000
+            resultados[modo] = {
+                "guardar_dia_ms": bridge,
+                "vaciar_ms":      round(vaciar_ms, 3),
+                "escrituras":     api._escritor.escrituras,
+            }
+        finally:
+            e.cerrar()
+
+    carpeta = tempfile.mkdtemp(prefix="adviser-bench-")
+    try:
+        ruta  = os.path.join(carpeta, "rutina.json")
+        datos = _rutina_variada(24)
+        resultados["guardar_json_ms"] = _medir(lambda: guardar_json(ruta, datos),
+                                               20 if rapido else 100)
+        resultados["guardar_json_bytes"] = os.path.getsize(ruta)
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+    return resultados
+
+
+# ─── Rutina ──────────────────────────────────────────────────────────────────
+def bench_get_rutina(rapido):
+    """Tamaño y tiempo de get_rutina, y del sync incremental que lo reemplaza."""
+    resultados = {}
+    repeticiones = 100 if rapido else 500
+    for slot_min in (60, 30, 15):
+        slots = 1440 // slot_min
+        e = _Entorno(config={"slot_minutos": slot_min})
+        try:
+            api = e.api
+            for dia, lista in _rutina_variada(slots).items():
+                api.rutina.fijar_dia(dia, lista)
+            completo = _medir(lambda: json.dumps(api.get_rutina(), ensure_ascii=False),
+                              repeticiones)
+            bytes_completo = len(json.dumps(api.get_rutina(), ensure_ascii=False).encode())
+
+            version = api.rutina.version
+            api.guardar_celda("lunes", 0, "Cambio", "Una sola celda")
+            delta = _medir(lambda: json.dumps(api.get_rutina_since(version), ensure_ascii=False),
+                           repeticiones)
+            bytes_delta = len(json.dumps(api.get_rutina_since(version), ensure_ascii=False).encode())
+
+            resultados[f"{slot_min}min"] = {
+                "get_rutina_ms":          completo,
+                "get_rutina_bytes":       bytes_completo,
+                "get_rutina_since_ms":    delta,
+                "get_rutina_since_bytes": bytes_delta,
+            }
+        finally:
+            e.cerrar()
+    return resultados
+
+
+# ─── Hilo principal ──────────────────────────────────────────────────────────
+def bench_main_queue(rapido):
+    """Latencia de _main_queue: desde otro hilo hasta que corre en el principal.
+
+    `_main_loop` atiende la cola en un hilo propio, como lo haría pywebview.
+    La ráfaga de resizes mide cuántos llegan de verdad a la ventana.
+    """
+    cola = adviser_main._main_queue
+    cola.drenar()
+    e = _Entorno()
+    hilo = threading.Thread(target=adviser_main._main_loop, args=(e.api,),
+                            name="bench-principal", daemon=True)
+    hilo.start()
+    try:
+        n = 500 if rapido else 5000
+        latencias = []
+        listo = threading.Event()
+        def _op(t0, ultima):
+            latencias.append(time.perf_counter() - t0)
+            if ultima:
+                listo.set()
+        for k in range(n):
+            cola.enviar(lambda t0=time.perf_counter(), u=(k == n - 1): _op(t0, u))
+            if k % 50 == 0:
+                time.sleep(0.0005)   # ráfagas, no una sola tanda
+        listo.wait(10)
+
+        listo.clear()
+        e.api._overlay.mostrar()
+        ov = e.api._overlay.ventana
+        rafaga = 200 if rapido else 1000
+        for k in range(rafaga):
+            e.api.overlay_resize(200 + k % 300, 150)
+        cola.enviar(listo.set)
+        listo.wait(10)
+
+        return {
+            "operaciones":    n,
+            "latencia_ms":    resumen_ms(latencias),
+            "resize_pedidos": rafaga,
+            "resize_hechos":  len(ov.resizes),
+            "cola":           cola.estadisticas(),
+        }
+    finally:
+        cola.detener()
+        hilo.join(2)
+        e.cerrar()
+
+
+BENCHMARKS = {
+    "crono_deriva":  bench_crono_deriva,
+    "push_overlay":  bench_push_overlay,
+    "guardar":       bench_guardar,
+    "get_rutina":    bench_get_rutina,
+    "main_queue":    bench_main_queue,
+}
+
+
+# ─── Resultados ──────────────────────────────────────────────────────────────
+def _commit():
+    try:
+        salida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                                capture_output=True, text=True, timeout=5)
+        return salida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _aplanar(datos, prefijo=""):
+    planos = {}
+    for clave, valor in datos.items():
+        nombre = f"{prefijo}.{clave}" if prefijo else clave
+        if isinstance(valor, dict):
+            planos.update(_aplanar(valor, nombre))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            planos[nombre] = valor
+    return planos
+
+
+def comparar(base, actual):
+    """Imprime las métricas que cambiaron más de un 10 % entre dos corridas.
+
+    Los tiempos que se movieron menos de 0.05 ms se ignoran (ruido).
+    """
+    a = _aplanar(base["resultados"])
+    b = _aplanar(actual["resultados"])
+    print(f"Comparando {base.get('commit')} → {actual.get('commit')}")
+    for clave in sorted(set(a) & set(b)):
+        antes, ahora = a[clave], b[clave]
+        if antes == ahora or clave.endswith(".n"):
+            continue
+        if "_ms" in clave and abs(ahora - antes) < 0.05:
+            continue
+        cambio = (ahora - antes) / antes * 100 if antes else float("inf")
+        if abs(cambio) >= 10:
+            print(f"  {clave:60s} {antes:>12} → {ahora:<12} ({cambio:+.0f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de Adviser")
+    parser.add_argument("--rapido", action="store_true", help="tamaños chicos (para CI)")
+    parser.add_argument("-s", "--salida", help="archivo JSON de resultados")
+    parser.add_argument("--comparar", metavar="JSON", help="resultados anteriores a comparar")
+    parser.add_argument("--solo", action="append", choices=sorted(BENCHMARKS),
+                        help="correr sólo este benchmark (se puede repetir)")
+    args = parser.parse_args(argv)
+
+    commit = _commit()
+    informe = {
+        "commit":     commit,
+        "fecha":      datetime.now().isoformat(timespec="seconds"),
+        "python":     platform.python_version(),
+        "plataforma": platform.platform(),
+        "rapido":     args.rapido,
+        "resultados": {},
+    }
+    for nombre in args.solo or BENCHMARKS:
+        print(f"[bench] {nombre}...")
+        t0 = time.perf_counter()
+        informe["resultados"][nombre] = BENCHMARKS[nombre](args.rapido)
+        print(f"[bench] {nombre} listo en {time.perf_counter() - t0:.1f}s")
+
+    salida = args.salida or os.path.join(
+        CARPETA_RESULTADOS, f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    with open(salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    print(f"[bench] Resultados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            comparar(json.load(f), informe)
+
+
+if __name__ == "__main__":
+    main()
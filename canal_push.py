@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+
+# ─── Canal de push Python → JS ───────────────────────────────────────────────
+# Un canal por ventana. Recuerda lo último que le mandó y en cada `enviar()`
+# arma un solo parche con lo que cambió desde entonces:
+#
+#   {"v": 12, "hechas": 3, "cambios": {"4": {"done": true}}, "nuevas": [...]}
+#
+# `v` es correlativo: si el JS ve un salto (se perdió un parche) pide el
+# estado completo de nuevo. Si no hay cambios, o la ventana no existe o está
+# oculta, no se llama a evaluate_js; al volver a ser visible se manda el
+# estado completo una vez.
+#
+# El parche se arma con el lock tomado, pero evaluate_js corre ya sin él:
+# registrar cambios nunca espera a que el JS conteste. Los envíos van de a
+# uno (otro lock) para que los parches lleguen en el orden de su versión.
+
+
+class CanalPush:
+    def __init__(self, funcion_js, ventana, estado_completo, visible=None, metricas=None):
+        """
+        funcion_js      -- función global del JS que aplica el parche
+        ventana         -- callable que devuelve la ventana destino (o None)
+        estado_completo -- callable que devuelve el estado entero (dict)
+        visible         -- callable opcional; si devuelve False no se envía
+        metricas        -- Metricas opcional donde se mide cada evaluate_js
+        """
+        self._funcion_js      = funcion_js
+        self._ventana         = ventana
+        self._estado_completo = estado_completo
+        self._visible         = visible or (lambda: True)
+        self._metricas        = metricas
+        self._lock            = threading.RLock()   # estado acumulado
+        self._envio           = threading.Lock()    # un evaluate_js a la vez
+
+        self.version    = 0
+        self._enviado   = {}     # último valor enviado de cada campo simple
+        self._campos    = {}     # campos simples modificados
+        self._cambios   = {}     # idx → {campo: valor} de ítems existentes
+        self._nuevas    = []     # ítems agregados
+        self._completo  = True   # el próximo envío debe ser el estado entero
+
+        self.enviados   = 0
+        self.omitidos   = 0
+
+    # ── Registrar cambios ────────────────────────────────────────────────────
+    def campo(self, nombre, valor):
+        with self._lock:
+            if self._enviado.get(nombre, _SIN_VALOR) == valor:
+                self._campos.pop(nombre, None)
+            else:
+                self._campos[nombre] = valor
+
+    def cambio_item(self, idx, **campos):
+        with self._lock:
+            self._cambios.setdefault(str(idx), {}).update(campos)
+
+    def item_nuevo(self, item):
+        with self._lock:
+            self._nuevas.append(dict(item))
+
+    def invalidar(self):
+        """Fuerza a que el próximo envío sea el estado completo."""
+        with self._lock:
+            self._completo = True
+
+    def sincronizado(self, estado):
+        """El JS acaba de leer `estado` por su cuenta (p. ej. al cargar).
+        Toma ese estado como base y devuelve la versión que debe guardar."""
+        with self._lock:
+            self._tomar_base(estado)
+            return self.version
+
+    # ── Envío ────────────────────────────────────────────────────────────────
+    def pendiente(self):
+        return self._completo or bool(self._campos or self._cambios or self._nuevas)
+
+    def enviar(self):
+        """Manda en un único evaluate_js todo lo acumulado. True si envió."""
+        with self._envio:
+            with self._lock:
+                ventana = self._ventana()
+                if ventana is None or not self._visible():
+                    if self.pendiente():
+                        # Lo acumulado se descarta: al volver a verse va completo
+                        self._limpiar()
+                        self._completo = True
+                        self.omitidos += 1
+                    return False
+
+                if self._completo:
+                    estado = self._estado_completo()
+                    self._tomar_base(estado)
+                    parche = dict(estado, completo=True)
+                elif self.pendiente():
+                    parche = dict(self._campos)
+                    if self._nuevas:
+                        parche["nuevas"] = self._nuevas
+                    if self._cambios:
+                        parche["cambios"] = self._cambios
+                    self._enviado.update(self._campos)
+                    self._limpiar()
+                else:
+                    return False
+
+                self.version += 1
+                parche["v"] = self.version
+                js = f"{self._funcion_js} && {self._funcion_js}({json.dumps(parche)})"
+
+            # Fuera del lock: mientras el JS responde se pueden seguir
+            # registrando cambios para el próximo parche
+            t0 = time.perf_counter()
+            try:
+                ventana.evaluate_js(js)
+                self.enviados += 1
+                return True
+            except Exception as e:
+                # El JS va a detectar el salto de versión y pedir el estado
+                if self._metricas:
+                    self._metricas.error(f"js.{self._funcion_js}", e)
+                return False
+            finally:
+                if self._metricas:
+                    self._metricas.observar(f"js.{self._funcion_js}", time.perf_counter() - t0)
+
+    # ── Internos ─────────────────────────────────────────────────────────────
+    def _tomar_base(self, estado):
+        self._enviado  = {k: v for k, v in estado.items() if not isinstance(v, (list, dict))}
+        self._completo = False
+        self._limpiar()
+
+    def _limpiar(self):
+        self._campos  = {}
+        self._cambios = {}
+        self._nuevas  = []
+
+
+_SIN_VALOR = object()
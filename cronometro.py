@@ -0,0 +1,159 @@
+import math
+import threading
+from collections import namedtuple
+
+from planificador import Planificador
+from tareas import AlmacenTareas
+
+# ─── Motor del cronómetro ────────────────────────────────────────────────────
+# Cada sesión guarda un deadline en tiempo monotónico y los segundos restantes
+# se calculan al pedirlos. Los ticks son solo avisos para refrescar la UI: si
+# uno se pierde o llega tarde, el siguiente ya trae el valor exacto.
+
+
+class Sesion:
+    __slots__ = ("nombre", "segs_total", "deadline", "restante_pausa", "on_tick", "on_fin")
+
+    def __init__(self, nombre, segs_total, on_tick, on_fin):
+        self.nombre         = nombre
+        self.segs_total     = segs_total
+        self.deadline       = None      # None mientras está en pausa
+        self.restante_pausa = None
+        self.on_tick        = on_tick
+        self.on_fin         = on_fin
+
+
+class MotorCronometro:
+    """Varias sesiones con nombre atendidas por un único hilo de ticks.
+
+    `on_tick(nombre, segs)` se llama cada vez que cambia el segundo entero
+    restante (incluido el 0) y `on_fin(nombre)` una sola vez al agotarse.
+    Iniciar otra vez un nombre reemplaza la sesión anterior.
+    """
+
+    def __init__(self, reloj=None, hilo=True):
+        self._plan     = Planificador(reloj, base="monotonic", hilo=hilo, nombre="adviser-crono")
+        self._sesiones = {}
+        self._lock     = threading.Lock()
+
+    @property
+    def planificador(self):
+        return self._plan
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def iniciar(self, nombre, segs_total, on_tick=None, on_fin=None):
+        s = Sesion(nombre, int(segs_total), on_tick, on_fin)
+        with self._lock:
+            s.deadline = self._plan.ahora() + s.segs_total
+            self._sesiones[nombre] = s
+        self._programar_tick(s)
+
+    def pausar(self, nombre):
+        with self._lock:
+            s = self._sesiones.get(nombre)
+            if s is None or s.deadline is None:
+                return False
+            s.restante_pausa = max(0.0, s.deadline - self._plan.ahora())
+            s.deadline       = None
+        self._plan.cancelar(nombre)
+        return True
+
+    def reanudar(self, nombre):
+        with self._lock:
+            s = self._sesiones.get(nombre)
+            if s is None or s.deadline is not None:
+                return False
+            s.deadline       = self._plan.ahora() + s.restante_pausa
+            s.restante_pausa = None
+        self._programar_tick(s)
+        return True
+
+    def cancelar(self, nombre):
+        with self._lock:
+            self._sesiones.pop(nombre, None)
+        self._plan.cancelar(nombre)
+
+    def activa(self, nombre):
+        return nombre in self._sesiones
+
+    def pausada(self, nombre):
+        s = self._sesiones.get(nombre)
+        return s is not None and s.deadline is None
+
+    def restantes(self, nombre):
+        """Segundos enteros restantes (redondeo hacia arriba), 0 si no existe."""
+        s = self._sesiones.get(nombre)
+        if s is None:
+            return 0
+        return self._restantes(s)
+
+    def sesiones(self):
+        return list(self._sesiones)
+
+    # ── Internos ─────────────────────────────────────────────────────────────
+    def _restantes(self, s):
+        if s.deadline is None:
+            return math.ceil(s.restante_pausa)
+        return max(0, math.ceil(s.deadline - self._plan.ahora()))
+
+    def _programar_tick(self, s):
+        deadline = s.deadline
+        if deadline is None:
+            return
+        # Próximo instante en que cambia el segundo entero mostrado
+        resto = max(0.0, deadline - self._plan.ahora())
+        cuando = deadline - max(0, math.ceil(resto) - 1)
+        self._plan.programar(s.nombre, cuando, lambda: self._tick(s))
+
+    def _tick(self, s):
+        with self._lock:
+            if self._sesiones.get(s.nombre) is not s or s.deadline is None:
+                return
+            segs = self._restantes(s)
+            if segs <= 0:
+                del self._sesiones[s.nombre]
+        if segs > 0:
+            self._programar_tick(s)
+        try:
+            if s.on_tick:
+                s.on_tick(s.nombre, segs)
+        finally:
+            if segs <= 0 and s.on_fin:
+                s.on_fin(s.nombre)
+
+
+# ─── Estado de la sesión del cronómetro ──────────────────────────────────────
+# EstadoCrono es inmutable en lo que describe a la sesión (activa o no,
+# duración, inicio): empezar o terminar una sesión publica un EstadoCrono
+# nuevo reemplazando la referencia, y quien lo lee no necesita lock.
+#
+# Las tareas, en cambio, viven en el AlmacenTareas de la sesión, que las
+# cambia en el lugar y con su propio lock (ver tareas.py): marcar una no
+# copia la lista. Quien necesita contadores y página coherentes entre sí los
+# pide juntos con tareas.foto(). Cada sesión tiene su propio almacén; al
+# terminar se congela, así que ni la sesión terminada ni CRONO_INACTIVO
+# aceptan cambios.
+
+
+class EstadoCrono(namedtuple("EstadoCrono", "activo tareas segs_total inicio")):
+    __slots__ = ()
+
+    @classmethod
+    def nuevo(cls, tareas, segs_total, inicio=0.0):
+        """Sesión activa a partir de la lista [{texto, done}] que manda el JS."""
+        return cls(True, AlmacenTareas(tareas), int(segs_total), inicio)
+
+    @property
+    def hechas(self):
+        return self.tareas.hechas
+
+    @property
+    def total(self):
+        return self.tareas.total
+
+    def terminada(self):
+        """La misma sesión, inactiva y con las tareas congeladas."""
+        return self._replace(activo=False, tareas=self.tareas.congelar())
+
+
+CRONO_INACTIVO = EstadoCrono(False, AlmacenTareas().congelar(), 0, 0.0)
@@ -0,0 +1,106 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+# ─── Despachador del hilo principal ──────────────────────────────────────────
+# webview.create_window() y window.destroy() tienen que correr en el hilo que
+# pywebview le da a `func`. En lugar de despertar cada 200ms a revisar una
+# cola, ese hilo se bloquea hasta que llega trabajo.
+#
+# Las operaciones pueden llevar una clave: si llega otra con la misma clave
+# antes de ejecutarse, reemplaza a la pendiente (p. ej. sólo el último resize
+# de una ventana). La operación conserva su lugar en la cola.
+
+
+class Despachador:
+    def __init__(self, muestras=512):
+        self._cond       = threading.Condition()
+        self._ops        = OrderedDict()     # clave → (fn, t_encolado)
+        self._anonimas   = itertools.count()
+        self._detenido   = False
+
+        self._esperas    = deque(maxlen=muestras)   # encolado → inicio (segs)
+        self._duraciones = deque(maxlen=muestras)   # duración de cada op (segs)
+        self.ejecutadas  = 0
+        self.fusionadas  = 0
+        self.errores     = 0
+        self.max_profundidad = 0
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def enviar(self, fn, clave=None):
+        """Encola `fn` para el hilo principal. Puede llamarse desde cualquier hilo."""
+        if clave is None:
+            clave = ("_", next(self._anonimas))
+        with self._cond:
+            previa = self._ops.get(clave)
+            if previa is not None:
+                self._ops[clave] = (fn, previa[1])
+                self.fusionadas += 1
+            else:
+                self._ops[clave] = (fn, time.perf_counter())
+                self.max_profundidad = max(self.max_profundidad, len(self._ops))
+            self._cond.notify()
+
+    def profundidad(self):
+        return len(self._ops)
+
+    def drenar(self):
+        """Ejecuta lo pendiente en el hilo actual sin bloquear. Devuelve cuántas."""
+        n = 0
+        while True:
+            with self._cond:
+                if not self._ops:
+                    return n
+                _, (fn, t0) = self._ops.popitem(last=False)
+            self._correr(fn, t0)
+            n += 1
+
+    def ejecutar(self):
+        """Bloquea el hilo actual atendiendo operaciones hasta `detener()`."""
+        while True:
+            with self._cond:
+                while not self._ops and not self._detenido:
+                    self._cond.wait()
+                if self._detenido:
+                    return
+            self.drenar()
+
+    def detener(self):
+        with self._cond:
+            self._detenido = True
+            self._cond.notify_all()
+
+    def estadisticas(self):
+        return {
+            "profundidad":     self.profundidad(),
+            "max_profundidad": self.max_profundidad,
+            "ejecutadas":      self.ejecutadas,
+            "fusionadas":      self.fusionadas,
+            "errores":         self.errores,
+            "espera_ms":       resumen_ms(self._esperas),
+            "duracion_ms":     resumen_ms(self._duraciones),
+        }
+
+    # ── Internos ─────────────────────────────────────────────────────────────
+    def _correr(self, fn, t0):
+        inicio = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            self.errores += 1
+            print(f"[Adviser queue] Error: {e}")
+        fin = time.perf_counter()
+        self._esperas.append(inicio - t0)
+        self._duraciones.append(fin - inicio)
+        self.ejecutadas += 1
+
+
+def resumen_ms(muestras):
+    """Resumen (n, p50, p95, max) en milisegundos de una lista de segundos."""
+    datos = sorted(muestras)
+    if not datos:
+        return {"n": 0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    def pct(p):
+        return round(datos[min(len(datos) - 1, int(p * len(datos)))] * 1000, 3)
+    return {"n": len(datos), "p50": pct(0.50), "p95": pct(0.95), "max": round(datos[-1] * 1000, 3)}
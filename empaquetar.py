@@ -0,0 +1,250 @@
+import os
+import re
+import sys
+
+from persistencia import firma
+
+# ─── Bundle de la interfaz web ───────────────────────────────────────────────
+# Paso de build: minifica style.css, script.js y los HTML, mete el CSS y el JS
+# adentro de ui.html y genera _bundle_web.py con cada página como un string:
+#
+#   python empaquetar.py
+#
+# En runtime, cargar() devuelve esa página para pasarla a create_window(html=)
+# desde memoria: en el .exe viaja compilado dentro del PYZ, sin extraer
+# archivos sueltos a _MEIPASS en cada arranque y sin pedir style.css y
+# script.js aparte antes de pintar.
+#
+# Al correr desde el código fuente, el bundle sólo se usa si está al día con
+# los archivos (misma firma mtime/tamaño); si no, se vuelve a file:///, así
+# editar script.js no obliga a reconstruir.
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+MODULO  = "_bundle_web"
+
+# página → archivos que la componen (la página primero)
+PAGINAS = {
+    "ui.html":      ("ui.html", "style.css", "script.js"),
+    "overlay.html": ("overlay.html",),
+}
+
+_PALABRAS_ANTES_DE_REGEX = {"return", "typeof", "case", "do", "else", "in", "of",
+                            "void", "yield", "await", "delete", "new", "instanceof"}
+
+
+# ─── Minificadores ───────────────────────────────────────────────────────────
+# Conservadores a propósito: quitan comentarios, sangría y líneas vacías pero
+# conservan los saltos de línea (el JS depende de ASI en varios lugares) y no
+# tocan strings, template literals ni expresiones regulares.
+def minificar_js(codigo):
+    salida = []
+    i, n   = 0, len(codigo)
+    pila   = []         # contextos abiertos: "`" (template) o un contador de llaves
+    inicio_linea = True
+
+    def ultimo_significativo():
+        texto = "".join(salida[-40:]).rstrip()
+        return texto[-1:] if texto else ""
+
+    def ultima_palabra():
+        m = re.search(r"([A-Za-z_$][\w$]*)\s*$", "".join(salida[-40:]))
+        return m.group(1) if m else ""
+
+    while i < n:
+        c = codigo[i]
+
+        # Dentro de un template literal se copia todo tal cual
+        if pila and pila[-1] == "`":
+            if c == "\\":
+                salida.append(codigo[i:i + 2]); i += 2; continue
+            if c == "`":
+                pila.pop(); salida.append(c); i += 1; continue
+            if codigo.startswith("${", i):
+                pila.append(0); salida.append("${"); i += 2; continue
+            salida.append(c); i += 1
+            continue
+
+        if inicio_linea and c in " \t":
+            i += 1
+            continue
+        inicio_linea = False
+
+        if c == "\n":
+            # Sin líneas vacías ni espacios al final
+            while salida and salida[-1] in (" ", "\t"):
+                salida.pop()
+            if salida and salida[-1] != "\n":
+                salida.append("\n")
+            inicio_linea = True
+            i += 1
+            continue
+
+        if codigo.startswith("//", i):
+            fin = codigo.find("\n", i)
+            i = n if fin < 0 else fin
+            continue
+        if codigo.startswith("/*", i):
+            fin = codigo.find("*/", i + 2)
+            i = n if fin < 0 else fin + 2
+            continue
+
+        if c in "'\"":
+            j = i + 1
+            while j < n and codigo[j] != c:
+                j += 2 if codigo[j] == "\\" else 1
+            salida.append(codigo[i:j + 1]); i = j + 1
+            continue
+
+        if c == "`":
+            pila.append("`"); salida.append(c); i += 1
+            continue
+
+        if c == "/":
+            previo = ultimo_significativo()
+            if previo == "" or previo in "(,=:[!&|?{};+-*%<>~^" or \
+                    ultima_palabra() in _PALABRAS_ANTES_DE_REGEX:
+                # Expresión regular: hasta la / que la cierra (fuera de [...])
+                j, en_clase = i + 1, False
+                while j < n and codigo[j] != "\n":
+                    if codigo[j] == "\\":
+                        j += 2; continue
+                    if codigo[j] == "[":
+                        en_clase = True
+                    elif codigo[j] == "]":
+                        en_clase = False
+                    elif codigo[j] == "/" and not en_clase:
+                        break
+                    j += 1
+                salida.append(codigo[i:j + 1]); i = j + 1
+                continue
+
+        if pila:
+            if c == "{":
+                pila[-1] += 1
+            elif c == "}":
+                if pila[-1] == 0:
+                    pila.pop()       # cierra el ${ ... } y vuelve al template
+                else:
+                    pila[-1] -= 1
+
+        salida.append(c)
+        i += 1
+
+    return "".join(salida).strip() + "\n"
+
+
+def minificar_css(codigo):
+    # Se separan los strings (p. ej. las url("data:...")) y sólo se tocan los
+    # tramos de código que quedan entre ellos
+    tramos, actual = [], []
+    i, n = 0, len(codigo)
+    while i < n:
+        c = codigo[i]
+        if codigo.startswith("/*", i):
+            fin = codigo.find("*/", i + 2)
+            i = n if fin < 0 else fin + 2
+            actual.append(" ")
+            continue
+        if c in "'\"":
+            j = i + 1
+            while j < n and codigo[j] != c:
+                j += 2 if codigo[j] == "\\" else 1
+            tramos.append(_compactar_css("".join(actual)))
+            tramos.append(codigo[i:j + 1])
+            actual, i = [], j + 1
+            continue
+        actual.append(c)
+        i += 1
+    tramos.append(_compactar_css("".join(actual)))
+    return "".join(tramos).strip()
+
+
+def _compactar_css(texto):
+    texto = re.sub(r"\s+", " ", texto)
+    texto = re.sub(r" ?([{};,]) ?", r"\1", texto)
+    texto = texto.replace(": ", ":").replace(";}", "}")
+    return texto
+
+
+def minificar_html(codigo):
+    """Sin comentarios ni sangría; <script> y <style> pasan por su minificador."""
+    partes = re.split(r"(<script>.*?</script>|<style>.*?</style>)", codigo, flags=re.S)
+    salida = []
+    for parte in partes:
+        if parte.startswith("<script>"):
+            salida.append("<script>\n" + minificar_js(parte[8:-9]) + "</script>")
+        elif parte.startswith("<style>"):
+            salida.append("<style>" + minificar_css(parte[7:-8]) + "</style>")
+        else:
+            parte = re.sub(r"<!--.*?-->", "", parte, flags=re.S)
+            lineas = (l.strip() for l in parte.split("\n"))
+            salida.append("\n".join(l for l in lineas if l))
+    return "\n".join(p for p in salida if p)
+
+
+# ─── Build ───────────────────────────────────────────────────────────────────
+def _leer(carpeta, nombre):
+    with open(os.path.join(carpeta, nombre), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def armar_pagina(carpeta, nombre):
+    """La página con su CSS y JS adentro, minificada."""
+    html = _leer(carpeta, nombre)
+    if nombre == "ui.html":
+        css = _leer(carpeta, "style.css")
+        js  = _leer(carpeta, "script.js")
+        # Con lambda: el CSS/JS no se interpreta como plantilla de re.sub
+        html = re.sub(r'<link rel="stylesheet" href="style\.css">',
+                      lambda m: f"<style>{css}</style>", html)
+        html = re.sub(r'<script src="script\.js"></script>',
+                      lambda m: f"<script>{js}</script>", html)
+        if "<style>" not in html or "<script>" not in html:
+            raise ValueError("ui.html ya no enlaza style.css / script.js como se esperaba")
+    return minificar_html(html)
+
+
+def construir(carpeta=CARPETA):
+    """Genera _bundle_web.py en `carpeta`. Devuelve {página: (bytes antes, después)}."""
+    paginas, fuentes, tamanios = {}, {}, {}
+    for pagina, archivos in PAGINAS.items():
+        paginas[pagina] = armar_pagina(carpeta, pagina)
+        fuentes[pagina] = {a: list(firma(os.path.join(carpeta, a))) for a in archivos}
+        antes = sum(os.path.getsize(os.path.join(carpeta, a)) for a in archivos)
+        tamanios[pagina] = (antes, len(paginas[pagina].encode("utf-8")))
+
+    ruta = os.path.join(carpeta, MODULO + ".py")
+    tmp  = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("# Generado por empaquetar.py: no editar a mano.\n")
+        f.write(f"FUENTES = {fuentes!r}\n")
+        f.write("PAGINAS = {\n")
+        for pagina, html in paginas.items():
+            f.write(f"    {pagina!r}: {html!r},\n")
+        f.write("}\n")
+    os.replace(tmp, ruta)
+    return tamanios
+
+
+# ─── Runtime ─────────────────────────────────────────────────────────────────
+def cargar(nombre, carpeta):
+    """HTML de la página desde el bundle, o None si no hay o quedó viejo."""
+    try:
+        import _bundle_web
+    except ImportError:
+        return None
+    html = _bundle_web.PAGINAS.get(nombre)
+    if html is None or getattr(sys, "frozen", False):
+        return html
+    for archivo, guardada in _bundle_web.FUENTES.get(nombre, {}).items():
+        actual = firma(os.path.join(carpeta, archivo))
+        if actual is not None and list(actual) != guardada:
+            print(f"[Adviser] Bundle web desactualizado ({archivo}); se usan los archivos.")
+            return None
+    return html
+
+
+if __name__ == "__main__":
+    for pagina, (antes, despues) in construir().items():
+        print(f"[Adviser] {pagina}: {antes / 1024:.1f} KB → {despues / 1024:.1f} KB")
+    print(f"[Adviser] Bundle escrito en {os.path.join(CARPETA, MODULO + '.py')}")
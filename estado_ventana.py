@@ -0,0 +1,186 @@
+import threading
+
+# ─── Estado de la ventana principal (minimizada / restaurada) ────────────────
+# Un proveedor avisa con `on_cambio(minimizada)` sólo cuando el estado cambia.
+# Hay tres implementaciones:
+#   - ProveedorEventos: usa los eventos minimized/restored de pywebview.
+#   - ProveedorPolling: último recurso, consulta Win32 a ritmo adaptativo.
+#   - ProveedorFalso:   en memoria, para probar sin Windows.
+
+_SW_SHOWMINIMIZED = 2
+
+
+class ProveedorEstadoVentana:
+    """Interfaz común de los proveedores."""
+
+    def __init__(self):
+        self.minimizada = False
+        self._on_cambio = None
+
+    def iniciar(self, on_cambio):
+        self._on_cambio = on_cambio
+
+    def detener(self):
+        self._on_cambio = None
+
+    def _notificar(self, minimizada):
+        if minimizada == self.minimizada:
+            return
+        self.minimizada = minimizada
+        if self._on_cambio:
+            self._on_cambio(minimizada)
+
+
+class ProveedorEventos(ProveedorEstadoVentana):
+    """Se suscribe a window.events.minimized / restored. No consume CPU."""
+
+    def __init__(self, ventana):
+        super().__init__()
+        self._ventana = ventana
+
+    def iniciar(self, on_cambio):
+        super().iniciar(on_cambio)
+        self._ventana.events.minimized += self._al_minimizar
+        self._ventana.events.restored  += self._al_restaurar
+
+    def detener(self):
+        try:
+            self._ventana.events.minimized -= self._al_minimizar
+            self._ventana.events.restored  -= self._al_restaurar
+        except Exception:
+            pass
+        super().detener()
+
+    def _al_minimizar(self, *args):
+        self._notificar(True)
+
+    def _al_restaurar(self, *args):
+        self._notificar(False)
+
+
+class ProveedorPolling(ProveedorEstadoVentana):
+    """Consulta GetWindowPlacement con el HWND cacheado.
+
+    El intervalo arranca en `intervalo_min` y crece hasta `intervalo_max`
+    mientras el estado no cambia; ante un cambio vuelve al mínimo.
+    """
+
+    def __init__(self, titulo="Adviser", intervalo_min=0.25, intervalo_max=1.0):
+        super().__init__()
+        self._win32         = _Win32(titulo)
+        self.intervalo_min  = intervalo_min
+        self.intervalo_max  = intervalo_max
+        self._parar         = threading.Event()
+        self.consultas      = 0
+
+    def iniciar(self, on_cambio):
+        super().iniciar(on_cambio)
+        self._parar.clear()
+        threading.Thread(target=self._loop, name="adviser-ventana", daemon=True).start()
+        print("[Adviser] Monitor de ventana iniciado (polling).")
+
+    def detener(self):
+        self._parar.set()
+        super().detener()
+
+    def _loop(self):
+        intervalo = self.intervalo_min
+        while not self._parar.wait(intervalo):
+            try:
+                is_min = self._win32.minimizada()
+            except Exception as e:
+                print(f"[Adviser] Error en poll: {e}")
+                continue
+            self.consultas += 1
+            if is_min != self.minimizada:
+                intervalo = self.intervalo_min
+                self._notificar(is_min)
+            else:
+                intervalo = min(self.intervalo_max, intervalo * 1.5)
+
+
+class ProveedorFalso(ProveedorEstadoVentana):
+    """Proveedor en memoria: las transiciones se disparan a mano."""
+
+    def minimizar(self):
+        self._notificar(True)
+
+    def restaurar(self):
+        self._notificar(False)
+
+
+def crear_proveedor(ventana, modo="eventos"):
+    """Elige el proveedor: eventos de pywebview si existen, si no polling."""
+    if modo == "falso":
+        return ProveedorFalso()
+    eventos = getattr(ventana, "events", None)
+    if modo == "eventos" and hasattr(eventos, "minimized") and hasattr(eventos, "restored"):
+        return ProveedorEventos(ventana)
+    return ProveedorPolling()
+
+
+# ─── Acceso a Win32 ──────────────────────────────────────────────────────────
+# win32gui es parte de pywin32. Si no está, usamos ctypes como fallback
+# (ctypes siempre está disponible en Windows sin instalar nada extra).
+# Todo se importa/define una sola vez, recién cuando se usa.
+
+_WINDOWPLACEMENT = None
+
+
+def _windowplacement():
+    global _WINDOWPLACEMENT
+    if _WINDOWPLACEMENT is None:
+        import ctypes
+        import ctypes.wintypes
+
+        class WINDOWPLACEMENT(ctypes.Structure):
+            _fields_ = [
+                ("length",           ctypes.c_uint),
+                ("flags",            ctypes.c_uint),
+                ("showCmd",          ctypes.c_uint),
+                ("ptMinPosition",    ctypes.wintypes.POINT),
+                ("ptMaxPosition",    ctypes.wintypes.POINT),
+                ("rcNormalPosition", ctypes.wintypes.RECT),
+            ]
+        _WINDOWPLACEMENT = WINDOWPLACEMENT
+    return _WINDOWPLACEMENT
+
+
+class _Win32:
+    def __init__(self, titulo):
+        self.titulo = titulo
+        self._hwnd  = None
+        try:
+            import win32gui
+            import win32con
+            self._win32gui = win32gui
+            self._win32con = win32con
+        except ImportError:
+            self._win32gui = None
+
+    def _buscar_hwnd(self):
+        """Devuelve el HWND cacheado; lo vuelve a buscar si dejó de ser válido."""
+        if self._win32gui:
+            if not self._hwnd or not self._win32gui.IsWindow(self._hwnd):
+                self._hwnd = self._win32gui.FindWindow(None, self.titulo)
+            return self._hwnd
+        import ctypes
+        import ctypes.wintypes
+        user32 = ctypes.windll.user32
+        if not self._hwnd or not user32.IsWindow(self._hwnd):
+            user32.FindWindowW.restype = ctypes.wintypes.HWND
+            self._hwnd = user32.FindWindowW(None, self.titulo)
+        return self._hwnd
+
+    def minimizada(self):
+        hwnd = self._buscar_hwnd()
+        if not hwnd:
+            return False
+        if self._win32gui:
+            placement = self._win32gui.GetWindowPlacement(hwnd)
+            return placement[1] == self._win32con.SW_SHOWMINIMIZED
+        import ctypes
+        wp = _windowplacement()()
+        wp.length = ctypes.sizeof(wp)
+        ctypes.windll.user32.GetWindowPlacement(hwnd, ctypes.byref(wp))
+        return wp.showCmd == _SW_SHOWMINIMIZED
@@ -0,0 +1,78 @@
+import threading
+
+# ─── Dobles de pywebview ─────────────────────────────────────────────────────
+# Reemplazan a webview.Window para correr la lógica de AdviserAPI sin GUI
+# (Linux, CI, benchmarks). Registran lo que se les pide en vez de dibujarlo.
+
+
+class EventoFalso:
+    """Imita webview.Event: admite `+=`, `-=` y `set()`."""
+
+    def __init__(self):
+        self._handlers = []
+
+    def __iadd__(self, fn):
+        self._handlers.append(fn)
+        return self
+
+    def __isub__(self, fn):
+        if fn in self._handlers:
+            self._handlers.remove(fn)
+        return self
+
+    def set(self, *args):
+        for fn in list(self._handlers):
+            fn(*args)
+
+
+class EventosFalsos:
+    def __init__(self):
+        self.loaded    = EventoFalso()
+        self.shown     = EventoFalso()
+        self.minimized = EventoFalso()
+        self.restored  = EventoFalso()
+        self.closed    = EventoFalso()
+
+
+class VentanaFalsa:
+    """Ventana sin pantalla. Guarda cada `evaluate_js` y cada cambio de tamaño."""
+
+    def __init__(self, title="Adviser", width=960, height=680, hidden=False):
+        self.title     = title
+        self.width     = width
+        self.height    = height
+        self.hidden    = hidden
+        self.minimized = False
+        self.destroyed = False
+        self.events    = EventosFalsos()
+
+        self.js        = []
+        self.resizes   = []
+        self._lock     = threading.Lock()
+
+    def evaluate_js(self, script):
+        with self._lock:
+            self.js.append(script)
+
+    def resize(self, width, height):
+        self.width, self.height = width, height
+        self.resizes.append((width, height))
+
+    def minimize(self):
+        self.minimized = True
+        self.events.minimized.set()
+
+    def restore(self):
+        self.minimized = False
+        self.events.restored.set()
+
+    def show(self):
+        self.hidden = False
+        self.events.shown.set()
+
+    def hide(self):
+        self.hidden = True
+
+    def destroy(self):
+        self.destroyed = True
+        self.events.closed.set()
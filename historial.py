@@ -0,0 +1,193 @@
+import json
+import mmap
+import os
+import threading
+from datetime import datetime
+
+from persistencia import escribir_atomico
+
+# ─── Historial de sesiones del cronómetro ────────────────────────────────────
+# Cada sesión terminada (completa, cancelada o agotada) se agrega como una
+# línea JSON compacta a historial.jsonl; el archivo nunca se reescribe.
+#
+# Los totales por día y por semana se suman al registrar y se guardan en
+# historial.resumen.json junto con el offset del log que ya incluyen. Al
+# arrancar sólo se lee (con mmap) lo que quedó después de ese offset, así que
+# abrir las estadísticas no depende de cuántos años de sesiones haya.
+
+CAMPOS_RESUMEN = ("sesiones", "completas", "canceladas", "agotadas",
+                  "tareas", "hechas", "segs", "exceso")
+
+
+def clave_dia(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+
+
+def clave_semana(ts):
+    anio, semana, _ = datetime.fromtimestamp(ts).isocalendar()
+    return f"{anio}-W{semana:02d}"
+
+
+def _vacio():
+    return dict.fromkeys(CAMPOS_RESUMEN, 0)
+
+
+class Historial:
+    def __init__(self, ruta, escritor):
+        """
+        ruta     -- historial.jsonl (el resumen va al lado, .resumen.json)
+        escritor -- EscritorDiferido que hace las escrituras a disco
+        """
+        self.ruta         = ruta
+        self.ruta_resumen = os.path.splitext(ruta)[0] + ".resumen.json"
+        self._escritor    = escritor
+        self._lock        = threading.Lock()
+        self._buffer      = []          # líneas registradas aún no escritas
+        self._cargar_resumen()
+
+    # ── Carga ────────────────────────────────────────────────────────────────
+    def _cargar_resumen(self):
+        try:
+            with open(self.ruta_resumen, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+            self._dias    = datos["dias"]
+            self._semanas = datos["semanas"]
+            self._total   = datos["total"]
+            self._offset  = int(datos["offset"])
+        except FileNotFoundError:
+            self._reiniciar_resumen()
+        except Exception as e:
+            print(f"[Adviser] Resumen del historial ilegible, se recalcula: {e}")
+            self._reiniciar_resumen()
+
+        tamanio = os.path.getsize(self.ruta) if os.path.exists(self.ruta) else 0
+        if tamanio < self._offset:
+            # El log fue reemplazado o truncado: el resumen ya no le corresponde
+            self._reiniciar_resumen()
+        for fin, sesion in self.leer(self.ruta, self._offset):
+            self._sumar(sesion)
+            self._offset = fin
+
+    def _reiniciar_resumen(self):
+        self._dias    = {}
+        self._semanas = {}
+        self._total   = _vacio()
+        self._offset  = 0
+
+    @staticmethod
+    def leer(ruta, desde=0):
+        """Sesiones del log desde el byte `desde`, como [(offset_fin, sesion)]."""
+        sesiones = []
+        try:
+            with open(ruta, "rb") as f:
+                if os.fstat(f.fileno()).st_size <= desde:
+                    return sesiones
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pos = desde
+                    while True:
+                        fin = mm.find(b"\n", pos)
+                        if fin < 0:
+                            break   # última línea cortada por un cierre abrupto
+                        try:
+                            sesiones.append((fin + 1, json.loads(mm[pos:fin])))
+                        except ValueError:
+                            pass
+                        pos = fin + 1
+        except FileNotFoundError:
+            pass
+        return sesiones
+
+    # ── Registro ─────────────────────────────────────────────────────────────
+    def registrar(self, sesion):
+        """Suma la sesión a los totales y agenda su escritura. O(1)."""
+        linea = json.dumps(sesion, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._sumar(sesion)
+            self._buffer.append(linea)
+        self._escritor.programar(self.ruta, self._volcar)
+
+    def _sumar(self, sesion):
+        fin = sesion.get("fin", 0)
+        for tabla, clave in ((self._dias, clave_dia(fin)), (self._semanas, clave_semana(fin))):
+            _acumular(tabla.setdefault(clave, _vacio()), sesion)
+        _acumular(self._total, sesion)
+
+    def _volcar(self):
+        # Con el lock tomado: el resumen guardado cubre justo lo que hay en el log
+        with self._lock:
+            if self._buffer:
+                with open(self.ruta, "a", encoding="utf-8") as f:
+                    f.write("\n".join(self._buffer) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._buffer = []
+            self._offset = os.path.getsize(self.ruta)
+            escribir_atomico(self.ruta_resumen, {
+                "offset":  self._offset,
+                "total":   self._total,
+                "dias":    self._dias,
+                "semanas": self._semanas,
+            })
+
+    # ── Consultas ────────────────────────────────────────────────────────────
+    def dia(self, ts):
+        with self._lock:
+            return dict(self._dias.get(clave_dia(ts), _vacio()))
+
+    def semana(self, ts):
+        with self._lock:
+            return dict(self._semanas.get(clave_semana(ts), _vacio()))
+
+    def resumen(self, hasta, dias=7):
+        """Totales de los últimos `dias` días hasta `hasta`, su semana y el total."""
+        with self._lock:
+            lista = []
+            for i in range(dias - 1, -1, -1):
+                clave = clave_dia(hasta - i * 86400)
+                lista.append(dict(self._dias.get(clave, _vacio()), dia=clave))
+            return {
+                "dias":   lista,
+                "semana": dict(self._semanas.get(clave_semana(hasta), _vacio()),
+                               semana=clave_semana(hasta)),
+                "total":  dict(self._total),
+            }
+
+    def ultimas(self, n=20):
+        """Las últimas `n` sesiones, más nuevas primero. Lee el log desde el final."""
+        with self._lock:
+            pendientes = [json.loads(l) for l in reversed(self._buffer[-n:])]
+        faltan = n - len(pendientes)
+        if faltan <= 0:
+            return pendientes
+        sesiones = []
+        try:
+            with open(self.ruta, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return pendientes
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    fin = mm.rfind(b"\n")
+                    while fin > 0 and len(sesiones) < faltan:
+                        inicio = mm.rfind(b"\n", 0, fin) + 1
+                        try:
+                            sesiones.append(json.loads(mm[inicio:fin]))
+                        except ValueError:
+                            pass
+                        fin = inicio - 1
+        except FileNotFoundError:
+            pass
+        return pendientes + sesiones
+
+
+def _acumular(reg, sesion):
+    resultado = sesion.get("resultado")
+    reg["sesiones"] += 1
+    if resultado == "completa":
+        reg["completas"] += 1
+    elif resultado == "cancelada":
+        reg["canceladas"] += 1
+    elif resultado == "agotada":
+        reg["agotadas"] += 1
+    reg["tareas"] += sesion.get("total", 0)
+    reg["hechas"] += sesion.get("hechas", 0)
+    reg["segs"]   += sesion.get("usado", 0)
+    reg["exceso"] += sesion.get("exceso", 0)
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import secrets
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+# ─── Instancia única y canal de comandos ─────────────────────────────────────
+# La primera instancia toma un lock de archivo en la carpeta de la app y abre
+# un canal local (socket Unix en Linux/macOS, named pipe en Windows). Una
+# segunda instancia no levanta otra GUI: ve el lock, le manda un comando a la
+# que ya corre y termina. La CLI (`python -m adviser now`) usa el mismo canal.
+#
+# Los mensajes son dicts {"cmd": str, "args": [...]} y la respuesta es el dict
+# que devuelve el manejador. La conexión se autentica con una clave guardada
+# en la carpeta de la app (sólo legible por el usuario).
+
+TIMEOUT = 2.0
+
+
+def direccion(carpeta):
+    """Dirección del canal para esa carpeta (una instancia por instalación)."""
+    h = hashlib.sha1(os.path.abspath(carpeta).encode("utf-8")).hexdigest()[:12]
+    if sys.platform == "win32":
+        return rf"\\.\pipe\adviser-{h}"
+    return os.path.join(tempfile.gettempdir(), f"adviser-{h}.sock")
+
+
+def _clave(carpeta, crear=False):
+    ruta = os.path.join(carpeta, ".adviser.clave")
+    try:
+        with open(ruta, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        if not crear:
+            return None
+    clave = secrets.token_bytes(32)
+    fd = os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(clave)
+    return clave
+
+
+def _bloquear(fd):
+    """Lock exclusivo y no bloqueante sobre el archivo. False si ya está tomado."""
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+class Instancia:
+    def __init__(self, carpeta):
+        self.carpeta   = carpeta
+        self.direccion = direccion(carpeta)
+        self._fd       = None
+        self._listener = None
+        self._hilo     = None
+        self.atendidos = 0
+
+    # ── Lock ─────────────────────────────────────────────────────────────────
+    def adquirir(self):
+        """Toma el lock de instancia única. False si otra instancia ya lo tiene."""
+        fd = os.open(os.path.join(self.carpeta, ".adviser.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        if not _bloquear(fd):
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    # ── Servidor ─────────────────────────────────────────────────────────────
+    def servir(self, manejador):
+        """Atiende comandos en un hilo: `manejador(cmd, args)` → dict."""
+        if self._fd is None:
+            raise RuntimeError("hay que adquirir el lock antes de servir")
+        if sys.platform != "win32" and os.path.exists(self.direccion):
+            os.remove(self.direccion)    # socket de una instancia que murió
+        self._listener = Listener(self.direccion, authkey=_clave(self.carpeta, crear=True))
+        if sys.platform != "win32":
+            os.chmod(self.direccion, 0o600)
+        self._hilo = threading.Thread(target=self._loop, args=(self._listener, manejador),
+                                      name="adviser-instancia", daemon=True)
+        self._hilo.start()
+
+    def _loop(self, listener, manejador):
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError:
+                continue
+            except OSError:
+                return      # listener cerrado
+            try:
+                if not conn.poll(TIMEOUT):
+                    continue
+                pedido = conn.recv()
+                try:
+                    respuesta = manejador(pedido.get("cmd"), pedido.get("args") or [])
+                except Exception as e:
+                    respuesta = {"ok": False, "error": str(e)}
+                conn.send(respuesta)
+                self.atendidos += 1
+            except (EOFError, OSError, AttributeError) as e:
+                print(f"[Adviser] Comando inválido en el canal: {e}")
+            finally:
+                conn.close()
+
+    def cerrar(self):
+        if self._listener is not None:
+            try:
+                self._listener.close()
+            except OSError:
+                pass
+            self._listener = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def enviar(carpeta, cmd, args=None, timeout=TIMEOUT):
+    """Manda un comando a la instancia que corre en `carpeta`.
+
+    Devuelve la respuesta, o None si no hay ninguna instancia escuchando.
+    """
+    clave = _clave(carpeta)
+    if clave is None:
+        return None
+    try:
+        conn = Client(direccion(carpeta), authkey=clave)
+    except (OSError, AuthenticationError):
+        return None
+    try:
+        conn.send({"cmd": cmd, "args": list(args or [])})
+        if not conn.poll(timeout):
+            return {"ok": False, "error": "la instancia no respondió"}
+        return conn.recv()
+    except (EOFError, OSError) as e:
+        return {"ok": False, "error": str(e)}
+    finally:
+        conn.close()
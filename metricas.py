@@ -0,0 +1,151 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+
+# ─── Métricas internas ───────────────────────────────────────────────────────
+# Histogramas de latencia (llamadas del bridge, evaluate_js), contadores de
+# errores que antes se tragaba un `except: pass`, y medidores que se leen al
+# pedir la instantánea (profundidad de colas, hilos vivos).
+#
+# Los histogramas usan cubetas fijas en ms, así que registrar una muestra es
+# O(log cubetas) y la memoria no crece con el uso.
+
+CUBETAS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histograma:
+    __slots__ = ("cuentas", "n", "suma", "max")
+
+    def __init__(self):
+        self.cuentas = [0] * (len(CUBETAS_MS) + 1)   # la última es "> 5000 ms"
+        self.n       = 0
+        self.suma    = 0.0
+        self.max     = 0.0
+
+    def observar(self, ms):
+        self.cuentas[bisect_left(CUBETAS_MS, ms)] += 1
+        self.n    += 1
+        self.suma += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentil(self, p):
+        """Cota superior de la cubeta donde cae el percentil `p` (0..1)."""
+        if not self.n:
+            return 0.0
+        objetivo = p * self.n
+        acumulado = 0
+        for i, c in enumerate(self.cuentas):
+            acumulado += c
+            if acumulado >= objetivo and c:
+                return min(CUBETAS_MS[i], self.max) if i < len(CUBETAS_MS) else self.max
+        return self.max
+
+    def a_dict(self):
+        return {
+            "n":       self.n,
+            "media":   round(self.suma / self.n, 3) if self.n else 0.0,
+            "p50":     round(self.percentil(0.50), 3),
+            "p95":     round(self.percentil(0.95), 3),
+            "p99":     round(self.percentil(0.99), 3),
+            "max":     round(self.max, 3),
+            "cubetas": {_etiqueta(i): c for i, c in enumerate(self.cuentas) if c},
+        }
+
+
+def _etiqueta(i):
+    return f"<={CUBETAS_MS[i]:g}" if i < len(CUBETAS_MS) else f">{CUBETAS_MS[-1]:g}"
+
+
+class Metricas:
+    def __init__(self):
+        self._lock        = threading.Lock()
+        self._histogramas = {}      # nombre → Histograma
+        self._contadores  = {}      # nombre → int
+        self._errores     = {}      # dónde → {"n", "ultimo"}
+        self._medidores   = {}      # nombre → callable sin argumentos
+        self.inicio       = time.time()
+
+    # ── Registrar ────────────────────────────────────────────────────────────
+    def observar(self, nombre, segs):
+        with self._lock:
+            h = self._histogramas.get(nombre)
+            if h is None:
+                h = self._histogramas[nombre] = Histograma()
+            h.observar(segs * 1000)
+
+    def contar(self, nombre, n=1):
+        with self._lock:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + n
+
+    def error(self, donde, e):
+        """Cuenta una excepción que se maneja sin cortar el flujo."""
+        with self._lock:
+            reg = self._errores.setdefault(donde, {"n": 0, "ultimo": ""})
+            reg["n"] += 1
+            reg["ultimo"] = f"{type(e).__name__}: {e}"
+
+    def medidor(self, nombre, fn):
+        """`fn()` se evalúa en cada instantánea (p. ej. largo de una cola)."""
+        self._medidores[nombre] = fn
+
+    # ── Leer ─────────────────────────────────────────────────────────────────
+    def instantanea(self):
+        with self._lock:
+            datos = {
+                "desde":       int(self.inicio),
+                "histogramas": {n: h.a_dict() for n, h in sorted(self._histogramas.items())},
+                "contadores":  dict(sorted(self._contadores.items())),
+                "errores":     {d: dict(r) for d, r in sorted(self._errores.items())},
+            }
+        medidores = {}
+        for nombre, fn in list(self._medidores.items()):
+            try:
+                medidores[nombre] = fn()
+            except Exception as e:
+                medidores[nombre] = {"error": str(e)}
+        datos["medidores"] = medidores
+        return datos
+
+
+def hilos():
+    """Cantidad de hilos vivos y los nombres de los propios de la app."""
+    vivos = threading.enumerate()
+    return {
+        "total":   len(vivos),
+        "adviser": sorted(h.name for h in vivos if h.name.startswith("adviser-")),
+    }
+
+
+# ─── Instrumentación del bridge ──────────────────────────────────────────────
+def medir_bridge(cls):
+    """Decorador de clase: mide cada método público en `self._metricas`.
+
+    Cuenta como fallida toda llamada que devuelve {"ok": False} y como error
+    la que lanza. El envoltorio conserva la firma que pywebview inspecciona.
+    """
+    for nombre, fn in list(vars(cls).items()):
+        if nombre.startswith("_") or not callable(fn):
+            continue
+        setattr(cls, nombre, _envolver(f"bridge.{nombre}", fn))
+    return cls
+
+
+def _envolver(clave, fn):
+    @functools.wraps(fn)
+    def medido(self, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            resultado = fn(self, *args, **kwargs)
+        except Exception as e:
+            self._metricas.error(clave, e)
+            raise
+        finally:
+            self._metricas.observar(clave, time.perf_counter() - t0)
+        if isinstance(resultado, dict) and resultado.get("ok") is False:
+            self._metricas.contar(f"{clave}.fallidas")
+        return resultado
+    medido.__signature__ = inspect.signature(fn)
+    return medido
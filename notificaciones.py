@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from despachador import resumen_ms
+
+# ─── Notificaciones ──────────────────────────────────────────────────────────
+# Los hilos de tiempo (asistente, cronómetro) sólo encolan avisos y siguen.
+# Un worker los entrega a un backend (winotify, archivo de log, memoria).
+# Los avisos idénticos muy seguidos se descartan y los que llegan juntos en
+# una ráfaga (p. ej. fin del cronómetro + cambio de franja) salen en una sola
+# notificación.
+
+
+# ─── Backends ────────────────────────────────────────────────────────────────
+class BackendNotificacion:
+    nombre = "base"
+
+    def mostrar(self, titulo, mensaje, loop):
+        raise NotImplementedError
+
+
+class BackendWinotify(BackendNotificacion):
+    """Toast nativo de Windows. winotify se importa recién al primer aviso."""
+
+    nombre = "winotify"
+
+    def __init__(self, icono=None):
+        self.icono = icono
+
+    def mostrar(self, titulo, mensaje, loop):
+        from winotify import Notification, audio
+        t = Notification(app_id="Adviser", title=titulo, msg=mensaje,
+                         duration="long", icon=self.icono)
+        t.set_audio(audio.LoopingCall if loop else audio.Reminder, loop=loop)
+        t.show()
+
+
+class BackendLog(BackendNotificacion):
+    """Agrega cada aviso como una línea en un archivo de texto."""
+
+    nombre = "log"
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def mostrar(self, titulo, mensaje, loop):
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            f.write(f"{fecha}\t{titulo}\t{mensaje}\n")
+
+
+class BackendMemoria(BackendNotificacion):
+    """Guarda los avisos en una lista. `demora` simula un backend lento."""
+
+    nombre = "memoria"
+
+    def __init__(self, demora=0.0):
+        self.demora    = demora
+        self.mostradas = []
+
+    def mostrar(self, titulo, mensaje, loop):
+        if self.demora:
+            time.sleep(self.demora)
+        self.mostradas.append((titulo, mensaje, loop))
+
+
+def backend_por_defecto(icono, ruta_log):
+    """winotify si está instalado, si no un archivo de log."""
+    try:
+        import importlib.util
+        if importlib.util.find_spec("winotify") is not None:
+            return BackendWinotify(icono)
+    except (ImportError, ValueError):
+        pass
+    return BackendLog(ruta_log)
+
+
+# ─── Worker ──────────────────────────────────────────────────────────────────
+class Notificador:
+    def __init__(self, backend, capacidad=32, coalescencia=0.25, ventana_duplicados=5.0):
+        """
+        capacidad          -- avisos en cola como máximo (se descartan los más viejos)
+        coalescencia       -- segundos que se espera a que termine una ráfaga
+        ventana_duplicados -- un aviso idéntico dentro de esta ventana se ignora
+        """
+        self.backend            = backend
+        self.capacidad          = capacidad
+        self.coalescencia       = coalescencia
+        self.ventana_duplicados = ventana_duplicados
+
+        self._cola      = deque()          # (titulo, mensaje, loop, t_encolado)
+        self._cond      = threading.Condition()
+        self._recientes = {}               # (titulo, mensaje) → t_monotónico
+        self._hilo      = None
+        self._detenido  = False
+        self._ocupado   = False
+
+        self._latencias  = deque(maxlen=256)
+        self.encolados   = 0
+        self.entregados  = 0
+        self.duplicados  = 0
+        self.fusionados  = 0
+        self.descartados = 0
+        self.errores     = 0
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def enviar(self, titulo, mensaje, loop=False):
+        """Encola un aviso sin bloquear. Devuelve False si se descartó."""
+        ahora = time.monotonic()
+        clave = (titulo, mensaje)
+        with self._cond:
+            previo = self._recientes.get(clave)
+            if previo is not None and ahora - previo < self.ventana_duplicados:
+                self.duplicados += 1
+                return False
+            self._recientes[clave] = ahora
+            if len(self._recientes) > 4 * self.capacidad:
+                self._recientes = {k: t for k, t in self._recientes.items()
+                                   if ahora - t < self.ventana_duplicados}
+            if len(self._cola) >= self.capacidad:
+                self._cola.popleft()
+                self.descartados += 1
+            self._cola.append((titulo, mensaje, loop, time.perf_counter()))
+            self.encolados += 1
+            self._cond.notify()
+        self._asegurar_hilo()
+        return True
+
+    def vaciar(self, timeout=5.0):
+        """Espera a que se entregue todo lo encolado (p. ej. antes de salir)."""
+        limite = time.monotonic() + timeout
+        with self._cond:
+            while (self._cola or self._ocupado) and time.monotonic() < limite:
+                self._cond.wait(0.05)
+        return not self._cola
+
+    def detener(self):
+        with self._cond:
+            self._detenido = True
+            self._cond.notify_all()
+
+    def estadisticas(self):
+        return {
+            "backend":     self.backend.nombre,
+            "en_cola":     len(self._cola),
+            "encolados":   self.encolados,
+            "entregados":  self.entregados,
+            "duplicados":  self.duplicados,
+            "fusionados":  self.fusionados,
+            "descartados": self.descartados,
+            "errores":     self.errores,
+            "latencia_ms": resumen_ms(self._latencias),
+        }
+
+    # ── Internos ─────────────────────────────────────────────────────────────
+    def _asegurar_hilo(self):
+        with self._cond:
+            if self._hilo is not None or self._detenido:
+                return
+            self._hilo = threading.Thread(target=self._loop, name="adviser-notificaciones",
+                                          daemon=True)
+        self._hilo.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._cola and not self._detenido:
+                    self._cond.wait()
+                if self._detenido:
+                    return
+                # La ventana de la ráfaga la fija el primer aviso: los que
+                # llegan después despiertan el wait, pero no la estiran ni
+                # la cortan antes de tiempo
+                limite = time.monotonic() + self.coalescencia
+                while not self._detenido:
+                    resto = limite - time.monotonic()
+                    if resto <= 0:
+                        break
+                    self._cond.wait(resto)
+                lote = list(self._cola)
+                self._cola.clear()
+                self._ocupado = True
+            try:
+                self._entregar(lote)
+            finally:
+                with self._cond:
+                    self._ocupado = False
+                    self._cond.notify_all()
+
+    def _entregar(self, lote):
+        if len(lote) == 1:
+            titulo, mensaje, loop, _ = lote[0]
+        else:
+            titulo  = f"{lote[-1][0]} (+{len(lote) - 1})"
+            mensaje = "\n".join(f"{t}: {m}" for t, m, _, _ in lote)
+            loop    = any(l for _, _, l, _ in lote)
+            self.fusionados += len(lote) - 1
+        try:
+            self.backend.mostrar(titulo, mensaje, loop)
+            self.entregados += 1
+        except Exception as e:
+            self.errores += 1
+            print(f"[Adviser] Error al notificar ({self.backend.nombre}): {e}")
+        fin = time.perf_counter()
+        for *_, t0 in lote:
+            self._latencias.append(fin - t0)
@@ -0,0 +1,88 @@
+# ─── Ventana del overlay ─────────────────────────────────────────────────────
+# El overlay se crea una sola vez, oculto, apenas arranca la app, y después
+# sólo se muestra y se oculta. Así overlay.html se carga una vez, su estado
+# queda vivo en el JS y mostrarlo no espera a que arranque otro WebView; al
+# volver a verse el canal de push le manda el estado completo.
+#
+# Dos implementaciones:
+#   - OverlayWebview: la ventana real de pywebview.
+#   - OverlayFalso:   una VentanaFalsa (falsos.py), para correr sin GUI.
+#
+# Todos los métodos tocan la ventana: llamarlos SOLO desde el hilo principal
+# (a través de _main_queue).
+
+
+class OverlayVentana:
+    """Interfaz común: preparar / mostrar / ocultar / destruir."""
+
+    def __init__(self):
+        self.ventana    = None      # la ventana, visible u oculta (None si no hay)
+        self.visible    = False
+        self.creaciones = 0
+        self.muestras   = 0
+
+    def preparar(self):
+        """Crea la ventana oculta si todavía no existe."""
+        if self.ventana is None:
+            self.ventana  = self._crear()
+            self.visible  = False
+            self.creaciones += 1
+            self.ventana.events.closed += self._al_cerrarse
+        return self.ventana
+
+    def mostrar(self):
+        if self.visible:
+            return
+        self.preparar().show()
+        self.visible   = True
+        self.muestras += 1
+
+    def ocultar(self):
+        if self.ventana is not None and self.visible:
+            self.ventana.hide()
+        self.visible = False
+
+    def destruir(self):
+        """Cierra la ventana de verdad (al salir de la app)."""
+        ventana, self.ventana, self.visible = self.ventana, None, False
+        if ventana is not None:
+            ventana.destroy()
+
+    def _crear(self):
+        raise NotImplementedError
+
+    def _al_cerrarse(self, *args):
+        # Cerrada por fuera (el sistema, Alt+F4): la próxima vez se recrea
+        self.ventana = None
+        self.visible = False
+
+
+class OverlayWebview(OverlayVentana):
+    def __init__(self, js_api, pagina):
+        """`pagina` devuelve {"url": ...} o {"html": ...} para create_window."""
+        super().__init__()
+        self._js_api = js_api
+        self._pagina = pagina
+
+    def _crear(self):
+        import webview
+        return webview.create_window(
+            title            = "Adviser · Cronómetro",
+            js_api           = self._js_api,
+            width            = 250,
+            height           = 150,
+            resizable        = True,
+            frameless        = True,
+            on_top           = True,
+            hidden           = True,
+            background_color = "#0D1018",
+            **self._pagina(),
+        )
+
+
+class OverlayFalso(OverlayVentana):
+    """Sin pantalla: la ventana es una VentanaFalsa que guarda los evaluate_js."""
+
+    def _crear(self):
+        from falsos import VentanaFalsa
+        return VentanaFalsa("Adviser · Cronómetro", 250, 150, hidden=True)
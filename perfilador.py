@@ -0,0 +1,154 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# ─── Perfilador por muestreo ─────────────────────────────────────────────────
+# Un hilo toma `sys._current_frames()` `hz` veces por segundo y cuenta cada
+# pila por hilo (con su nombre: adviser-crono, adviser-planificador...). No
+# instrumenta nada: si está apagado no existe, y prendido cuesta una foto de
+# las pilas por muestra.
+#
+# Al detenerlo escribe:
+#   - perfil.collapsed: "hilo;modulo:funcion;...;modulo:funcion N" por línea,
+#     el formato que leen flamegraph.pl, speedscope o inferno.
+#   - perfil.txt: muestras por hilo y las funciones más vistas (propias e
+#     inclusivas), también impreso en consola.
+#
+# Se prende con `python -m adviser --perfil [HZ]` o con "perfilador" en
+# config.json (true, o {"hz": 200, "top": 30}).
+
+HZ_DEFAULT  = 100
+TOP_DEFAULT = 20
+PROFUNDIDAD = 64        # marcos por pila; lo más profundo se corta
+
+
+class Perfilador:
+    def __init__(self, hz=HZ_DEFAULT, top=TOP_DEFAULT):
+        if hz <= 0:
+            raise ValueError(f"hz inválido: {hz}")
+        self.hz        = hz
+        self.top       = top
+        self.muestras  = 0
+        self.atrasos   = 0          # muestras que llegaron tarde al intervalo
+        self._pilas    = Counter()  # (hilo, (marco, ...)) → muestras
+        self._nombres  = {}         # code object → "modulo:funcion"
+        self._parar    = threading.Event()
+        self._hilo     = None
+        self._inicio   = None
+        self._duracion = 0.0
+
+    # ── Ciclo de vida ────────────────────────────────────────────────────────
+    def iniciar(self):
+        self._parar.clear()
+        self._inicio = time.perf_counter()
+        self._hilo   = threading.Thread(target=self._loop, name="adviser-perfilador", daemon=True)
+        self._hilo.start()
+        print(f"[Adviser] Perfilador activo a {self.hz} Hz.")
+
+    def detener(self):
+        self._parar.set()
+        if self._hilo is not None:
+            self._hilo.join(2)
+            self._hilo = None
+        if self._inicio is not None:
+            self._duracion = time.perf_counter() - self._inicio
+
+    def _loop(self):
+        intervalo = 1.0 / self.hz
+        propio    = threading.get_ident()
+        proxima   = time.perf_counter()
+        while True:
+            proxima += intervalo
+            espera   = proxima - time.perf_counter()
+            if espera < 0:
+                # Muy atrasado (suspensión, GIL ocupado): no recuperar en ráfaga
+                self.atrasos += 1
+                proxima = time.perf_counter()
+                espera  = 0
+            if self._parar.wait(espera):
+                return
+            self.muestrear(propio)
+
+    def muestrear(self, excluir=None):
+        """Toma una muestra de todas las pilas (menos la del hilo `excluir`)."""
+        nombres = {h.ident: h.name for h in threading.enumerate()}
+        for ident, marco in sys._current_frames().items():
+            if ident == excluir:
+                continue
+            pila = []
+            while marco is not None and len(pila) < PROFUNDIDAD:
+                pila.append(self._nombre(marco.f_code))
+                marco = marco.f_back
+            pila.reverse()
+            self._pilas[(nombres.get(ident, f"hilo-{ident}"), tuple(pila))] += 1
+        self.muestras += 1
+
+    def _nombre(self, code):
+        nombre = self._nombres.get(code)
+        if nombre is None:
+            modulo = os.path.splitext(os.path.basename(code.co_filename))[0]
+            nombre = self._nombres[code] = f"{modulo}:{code.co_name}"
+        return nombre
+
+    # ── Resultados ───────────────────────────────────────────────────────────
+    def collapsed(self):
+        """Líneas en formato de pilas colapsadas, de la más vista a la menos."""
+        return [f"{';'.join((hilo,) + pila)} {n}"
+                for (hilo, pila), n in self._pilas.most_common()]
+
+    def resumen(self):
+        """Muestras por hilo y el top de funciones propias e inclusivas."""
+        por_hilo   = Counter()
+        propias    = Counter()
+        inclusivas = Counter()
+        for (hilo, pila), n in self._pilas.items():
+            por_hilo[hilo] += n
+            if pila:
+                propias[(hilo, pila[-1])] += n
+            for marco in set(pila):
+                inclusivas[(hilo, marco)] += n
+        return {
+            "muestras":   self.muestras,
+            "atrasos":    self.atrasos,
+            "segundos":   round(self._duracion, 1),
+            "hz":         self.hz,
+            "hilos":      dict(por_hilo.most_common()),
+            "propias":    [[h, f, n] for (h, f), n in propias.most_common(self.top)],
+            "inclusivas": [[h, f, n] for (h, f), n in inclusivas.most_common(self.top)],
+        }
+
+    def texto_resumen(self):
+        r = self.resumen()
+        total = max(r["muestras"], 1)
+        lineas = [f"Perfil: {r['muestras']} muestras en {r['segundos']} s a {r['hz']} Hz "
+                  f"({r['atrasos']} atrasadas)", "", "Muestras por hilo:"]
+        lineas += [f"  {n:7d}  {hilo}" for hilo, n in r["hilos"].items()]
+        for clave in ("propias", "inclusivas"):
+            lineas += ["", f"Top {self.top} funciones ({clave}):"]
+            lineas += [f"  {n:7d}  {n * 100 / total:5.1f}%  {hilo}  {funcion}"
+                       for hilo, funcion, n in r[clave]]
+        return "\n".join(lineas)
+
+    def escribir(self, carpeta):
+        """Guarda perfil.collapsed y perfil.txt en `carpeta` e imprime el resumen."""
+        with open(os.path.join(carpeta, "perfil.collapsed"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+        texto = self.texto_resumen()
+        with open(os.path.join(carpeta, "perfil.txt"), "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+        print(texto)
+        print(f"[Adviser] Perfil guardado en {os.path.join(carpeta, 'perfil.collapsed')}")
+
+
+def desde_config(valor, hz=None):
+    """Perfilador según "perfilador" de config.json y/o la opción --perfil.
+
+    Devuelve None si ninguno de los dos lo pide.
+    """
+    if not valor and hz is None:
+        return None
+    opciones = valor if isinstance(valor, dict) else {}
+    return Perfilador(hz=float(hz or opciones.get("hz", HZ_DEFAULT)),
+                      top=int(opciones.get("top", TOP_DEFAULT)))
@@ -0,0 +1,199 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from persistencia import escribir_atomico
+
+# ─── Perfiles de rutina ──────────────────────────────────────────────────────
+# Al arrancar sólo se lee perfiles/indice.json (nombre, archivo, tamaño y
+# fecha de cada perfil). El contenido de un perfil se carga recién la
+# primera vez que se usa y queda en un caché LRU acotado: volver a un perfil
+# reciente no vuelve a parsear su JSON.
+#
+# El perfil "principal" es el rutina.json de siempre.
+
+PERFIL_PRINCIPAL = "principal"
+
+
+def _nombre_archivo(nombre):
+    limpio = re.sub(r"[^\w\-]+", "_", nombre.strip().lower(), flags=re.UNICODE)
+    return limpio or "perfil"
+
+
+class AlmacenPerfiles:
+    def __init__(self, base, ruta_principal, cargar, capacidad=4, al_escribir=None):
+        """
+        base           -- carpeta de la app; los perfiles van en base/perfiles
+        ruta_principal -- rutina.json (perfil "principal")
+        cargar         -- callable(ruta) → Rutina, usado al pedir un perfil
+        capacidad      -- cuántos perfiles quedan cargados en memoria
+        al_escribir    -- callable(ruta, rutina) opcional, con la copia exacta
+                          que acaba de quedar en disco
+        """
+        self.base           = base
+        self.carpeta        = os.path.join(base, "perfiles")
+        self.ruta_indice    = os.path.join(self.carpeta, "indice.json")
+        self.ruta_principal = ruta_principal
+        self.capacidad      = max(1, capacidad)
+        self._cargar        = cargar
+        self._al_escribir   = al_escribir
+        self._cache         = OrderedDict()     # nombre → Rutina
+        self._lock          = threading.RLock()
+
+        self.cargas   = 0
+        self.aciertos = 0
+
+        self._indice = self._leer_indice()
+
+    # ── Índice ───────────────────────────────────────────────────────────────
+    def _leer_indice(self):
+        try:
+            with open(self.ruta_indice, "r", encoding="utf-8") as f:
+                indice = json.load(f)
+            if isinstance(indice.get("perfiles"), dict):
+                indice["perfiles"].setdefault(PERFIL_PRINCIPAL, {"archivo": None})
+                activo = indice.get("activo", PERFIL_PRINCIPAL)
+                if activo not in indice["perfiles"]:
+                    # Índice viejo o editado a mano: se vuelve al principal
+                    print(f"[Adviser] El perfil activo {activo!r} no existe; se usa el principal.")
+                    activo = PERFIL_PRINCIPAL
+                indice["activo"] = activo
+                return indice
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[Adviser] Índice de perfiles ilegible, se reconstruye: {e}")
+        return self._reconstruir_indice()
+
+    def _reconstruir_indice(self):
+        """Arma el índice mirando los archivos (stat, sin parsear)."""
+        indice = {"activo": PERFIL_PRINCIPAL, "perfiles": {PERFIL_PRINCIPAL: {"archivo": None}}}
+        if os.path.isdir(self.carpeta):
+            for archivo in sorted(os.listdir(self.carpeta)):
+                if archivo.endswith(".json") and archivo != "indice.json":
+                    indice["perfiles"][archivo[:-5]] = {"archivo": archivo}
+        for nombre in indice["perfiles"]:
+            indice["perfiles"][nombre].update(self._meta_archivo(self._ruta(indice, nombre)))
+        return indice
+
+    def _meta_archivo(self, ruta):
+        try:
+            st = os.stat(ruta)
+            return {"bytes": st.st_size, "modificado": int(st.st_mtime)}
+        except OSError:
+            return {"bytes": 0, "modificado": int(time.time())}
+
+    def a_json(self):
+        with self._lock:
+            return {"activo": self._indice["activo"],
+                    "perfiles": {n: dict(m) for n, m in self._indice["perfiles"].items()}}
+
+    # ── Consultas ────────────────────────────────────────────────────────────
+    @property
+    def activo(self):
+        return self._indice["activo"]
+
+    def existe(self, nombre):
+        return nombre in self._indice["perfiles"]
+
+    def listar(self):
+        """Metadatos de todos los perfiles, sin cargar ninguno."""
+        with self._lock:
+            return [dict(meta, nombre=nombre) for nombre, meta in self._indice["perfiles"].items()]
+
+    def _ruta(self, indice, nombre):
+        archivo = indice["perfiles"][nombre].get("archivo")
+        if archivo is None:
+            return self.ruta_principal
+        return os.path.join(self.carpeta, archivo)
+
+    def ruta(self, nombre):
+        return self._ruta(self._indice, nombre)
+
+    def obtener(self, nombre):
+        """Rutina del perfil; la carga del disco sólo si no está en caché."""
+        with self._lock:
+            rutina = self._cache.get(nombre)
+            if rutina is not None:
+                self._cache.move_to_end(nombre)
+                self.aciertos += 1
+                return rutina
+            if not self.existe(nombre):
+                raise KeyError(f"perfil inexistente: {nombre}")
+            rutina = self._cargar(self.ruta(nombre))
+            self.cargas += 1
+            self._cache[nombre] = rutina
+            self._recortar(nombre)
+            return rutina
+
+    def cargados(self):
+        return list(self._cache)
+
+    def _recortar(self, conservar=None):
+        # Nunca se descartan el perfil activo ni `conservar` (el que se acaba
+        # de pedir); si no queda otro, el caché se pasa de la capacidad hasta
+        # el próximo recorte
+        while len(self._cache) > self.capacidad:
+            viejo = next((n for n in self._cache if n not in (self.activo, conservar)), None)
+            if viejo is None:
+                break
+            del self._cache[viejo]
+
+    # ── Cambios ──────────────────────────────────────────────────────────────
+    def activar(self, nombre):
+        with self._lock:
+            rutina = self.obtener(nombre)
+            self._indice["activo"] = nombre
+            # Ahora sí puede salir el que era el activo
+            self._recortar()
+            return rutina
+
+    def crear(self, nombre, rutina, escritor):
+        """Registra un perfil nuevo con el contenido de `rutina` y agenda su escritura."""
+        nombre = nombre.strip()
+        with self._lock:
+            if not nombre or self.existe(nombre):
+                raise ValueError(f"nombre de perfil inválido o repetido: {nombre!r}")
+            archivo = _nombre_archivo(nombre) + ".json"
+            usados  = {m.get("archivo") for m in self._indice["perfiles"].values()}
+            n = 2
+            while archivo in usados or archivo == "indice.json":
+                archivo = f"{_nombre_archivo(nombre)}_{n}.json"
+                n += 1
+            # Hasta que el escritor lo baje a disco el perfil vive en el caché;
+            # el tamaño real llega con la escritura
+            self._indice["perfiles"][nombre] = {"archivo": archivo, "bytes": 0,
+                                                "modificado": int(time.time())}
+            self._cache[nombre] = rutina
+            self._recortar(nombre)
+            self._agendar(nombre, rutina, escritor)
+            return rutina
+
+    def guardar(self, nombre, escritor):
+        """Agenda la escritura del perfil y la actualización del índice."""
+        self._agendar(nombre, self.obtener(nombre), escritor)
+
+    def _agendar(self, nombre, rutina, escritor):
+        ruta = self.ruta(nombre)
+        def _trabajo():
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            # Se escribe una copia: lo que queda en disco es exactamente `copia`
+            copia = rutina.copia()
+            escribir_atomico(ruta, copia.a_json())
+            if self._al_escribir is not None:
+                self._al_escribir(ruta, copia)
+            self.actualizar_meta(nombre)
+            self.guardar_indice(escritor)
+        escritor.programar(ruta, _trabajo)
+
+    def actualizar_meta(self, nombre):
+        with self._lock:
+            if self.existe(nombre):
+                self._indice["perfiles"][nombre].update(self._meta_archivo(self.ruta(nombre)))
+
+    def guardar_indice(self, escritor):
+        os.makedirs(self.carpeta, exist_ok=True)
+        escritor.guardar(self.ruta_indice, self.a_json)
@@ -0,0 +1,193 @@
+import json
+import os
+import tempfile
+import threading
+
+from planificador import Planificador
+
+# ─── Persistencia ────────────────────────────────────────────────────────────
+# Las llamadas del bridge sólo marcan qué hay que guardar; un hilo aparte
+# escribe a disco agrupando las ráfagas de cambios. Cada archivo se escribe
+# en un temporal del mismo directorio y se reemplaza con os.replace(), así
+# que un corte a mitad de escritura nunca deja el JSON truncado.
+#
+# Cada escritura anota la firma (mtime, tamaño) del archivo resultante; el
+# vigilante de recarga (recarga.py) la usa para no recargar lo que escribimos.
+
+_propias      = {}     # ruta absoluta → firma de nuestra última escritura
+_propias_lock = threading.Lock()
+
+
+def firma(ruta):
+    """(mtime_ns, tamaño) del archivo, o None si no existe."""
+    try:
+        st = os.stat(ruta)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def escritura_propia(ruta, firma_actual):
+    """True si `firma_actual` es la de la última escritura de la app en `ruta`."""
+    with _propias_lock:
+        return _propias.get(os.path.abspath(ruta)) == firma_actual
+
+
+def escribir_atomico(ruta, datos):
+    """Escribe `datos` como JSON en `ruta` de forma atómica."""
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=carpeta)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, ruta)
+        with _propias_lock:
+            _propias[os.path.abspath(ruta)] = firma(ruta)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class EscritorDiferido:
+    """Trabajos de escritura con debounce, corridos en un único hilo.
+
+    Un trabajo con la misma clave reemplaza al pendiente y corre `demora`
+    segundos después del último pedido, pero nunca más de `demora_max`
+    después del primero (una ráfaga continua igual termina en disco).
+    """
+
+    def __init__(self, demora=0.5, demora_max=3.0, reloj=None, hilo=True):
+        self.demora      = demora
+        self.demora_max  = demora_max
+        self._plan       = Planificador(reloj, base="monotonic", hilo=hilo, nombre="adviser-escritor")
+        self._lock       = threading.Lock()
+        self._io         = threading.Lock()   # un trabajo a la vez, hilo o vaciar()
+        self._pendientes = {}                 # clave → (fn, t_primer_pedido)
+
+        self.pedidos     = 0
+        self.escrituras  = 0
+        self.errores     = 0
+
+    @property
+    def planificador(self):
+        return self._plan
+
+    def programar(self, clave, fn):
+        ahora = self._plan.ahora()
+        with self._lock:
+            previo = self._pendientes.get(clave)
+            primero = previo[1] if previo else ahora
+            self._pendientes[clave] = (fn, primero)
+            self.pedidos += 1
+        cuando = min(ahora + self.demora, primero + self.demora_max)
+        self._plan.programar(clave, cuando, lambda: self._correr(clave))
+
+    def guardar(self, ruta, obtener_datos):
+        """Guarda en `ruta` lo que devuelva `obtener_datos()` al momento de escribir."""
+        self.programar(ruta, lambda: escribir_atomico(ruta, obtener_datos()))
+
+    def vaciar(self):
+        """Ejecuta ya, en el hilo actual, todo lo pendiente (p. ej. al cerrar).
+
+        Un trabajo puede agendar otro (guardar un perfil actualiza el índice):
+        se repite hasta que no quede nada pendiente.
+        """
+        while True:
+            with self._lock:
+                claves = list(self._pendientes)
+            if not claves:
+                return
+            for clave in claves:
+                self._plan.cancelar(clave)
+                self._correr(clave)
+
+    def pendientes(self):
+        return len(self._pendientes)
+
+    def _correr(self, clave):
+        with self._io:
+            with self._lock:
+                trabajo = self._pendientes.pop(clave, None)
+            if trabajo is None:
+                return
+            try:
+                trabajo[0]()
+                self.escrituras += 1
+            except Exception as e:
+                self.errores += 1
+                print(f"[Adviser] Error al guardar {clave}: {e}")
+
+
+class Diario:
+    """Journal append-only de celdas editadas.
+
+    Cada línea es `{"k": clave, "v": valor}`. Las líneas se acumulan en
+    memoria y el escritor las agrega al archivo en segundo plano. Al cargar
+    se aplican sobre el snapshot; cuando hay `compactar_cada` entradas, el
+    snapshot se reescribe y el journal se vacía.
+
+    `al_volcar(entradas)`, si se pasa, se llama con las (clave, valor) que
+    acaban de llegar al archivo.
+    """
+
+    def __init__(self, ruta, escritor, compactar_cada=200, al_volcar=None):
+        self.ruta           = ruta
+        self.compactar_cada = compactar_cada
+        self._escritor      = escritor
+        self._al_volcar     = al_volcar
+        self._buffer        = []     # (clave, valor) aún no escritos
+        self._lock          = threading.Lock()
+        self.entradas       = sum(1 for _ in self.leer(ruta))
+
+    @staticmethod
+    def leer(ruta):
+        """Devuelve las entradas (clave, valor) válidas del journal en orden."""
+        entradas = []
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                for linea in f:
+                    try:
+                        e = json.loads(linea)
+                        entradas.append((e["k"], e["v"]))
+                    except (ValueError, KeyError, TypeError):
+                        break   # última línea cortada por un cierre abrupto
+        except FileNotFoundError:
+            pass
+        return entradas
+
+    def registrar(self, clave, valor):
+        with self._lock:
+            self._buffer.append((clave, valor))
+            self.entradas += 1
+        self._escritor.programar(self.ruta, self._volcar)
+
+    def necesita_compactar(self):
+        return self.entradas >= self.compactar_cada
+
+    def compactar(self, ruta_snapshot, obtener_datos):
+        """Reescribe el snapshot completo y vacía el journal (en el escritor)."""
+        def _trabajo():
+            escribir_atomico(ruta_snapshot, obtener_datos())
+            with open(self.ruta, "w", encoding="utf-8"):
+                pass
+            with self._lock:
+                self.entradas = len(self._buffer)
+        self._escritor.programar(ruta_snapshot, _trabajo)
+
+    def _volcar(self):
+        with self._lock:
+            entradas, self._buffer = self._buffer, []
+        if not entradas:
+            return
+        lineas = (json.dumps({"k": k, "v": v}, ensure_ascii=False) for k, v in entradas)
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self._al_volcar is not None:
+            self._al_volcar(entradas)
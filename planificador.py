@@ -0,0 +1,198 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta
+
+# ─── Planificador por deadlines ──────────────────────────────────────────────
+# Un único hilo duerme sobre una Condition hasta el próximo deadline del heap.
+# Programar, reprogramar o cancelar una tarea lo despierta al instante, así que
+# no hace falta "mirar la bandera" cada segundo.
+
+# Tope de espera: si el equipo se suspende o cambia la hora del sistema, el
+# hilo vuelve a mirar el reloj como mucho una vez por minuto.
+MAX_ESPERA = 60.0
+
+
+class RelojReal:
+    """Reloj del sistema. Es el que usa la app normalmente."""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def ahora(self):
+        return datetime.now()
+
+    def esperar(self, cond, timeout):
+        cond.wait(timeout)
+
+
+class RelojFalso:
+    """Reloj manual para medir deriva y cantidad de despertares sin esperar.
+
+    El tiempo solo avanza con `avanzar()`. Los hilos que esperan sobre este
+    reloj se despiertan recién cuando se avanza.
+    """
+
+    def __init__(self, inicio=None):
+        self._t     = (inicio or datetime(2024, 1, 1, 8, 0, 0)).timestamp()
+        self._mono  = 0.0
+        self._conds = []
+
+    def time(self):
+        return self._t
+
+    def monotonic(self):
+        return self._mono
+
+    def ahora(self):
+        return datetime.fromtimestamp(self._t)
+
+    def esperar(self, cond, timeout):
+        if cond not in self._conds:
+            self._conds.append(cond)
+        cond.wait()
+
+    def avanzar(self, segs):
+        self._t    += segs
+        self._mono += segs
+        for cond in list(self._conds):
+            with cond:
+                cond.notify_all()
+
+
+def proximo_limite(ahora, slot_minutos=60):
+    """Devuelve el datetime del próximo inicio de franja posterior a `ahora`."""
+    inicio_dia = ahora.replace(hour=0, minute=0, second=0, microsecond=0)
+    minutos    = ahora.hour * 60 + ahora.minute
+    siguiente  = (minutos // slot_minutos + 1) * slot_minutos
+    return inicio_dia + timedelta(minutes=siguiente)
+
+
+def indice_slot(ahora, slot_minutos=60):
+    """Índice de la franja del día que contiene a `ahora`."""
+    return (ahora.hour * 60 + ahora.minute) // slot_minutos
+
+
+class Planificador:
+    """Servicio de temporización: un min-heap de deadlines y un solo hilo.
+
+    Cada tarea tiene una clave; programar otra vez la misma clave reemplaza
+    a la anterior, lo que evita disparos duplicados. `base` elige el reloj de
+    los deadlines: "time" (hora de pared) o "monotonic".
+
+    Con `hilo=False` no se lanza ningún hilo y las tareas vencidas se corren
+    llamando a `ejecutar_pendientes()` (útil junto con `RelojFalso`).
+    """
+
+    def __init__(self, reloj=None, base="time", hilo=True, nombre="adviser-planificador"):
+        self.reloj      = reloj or RelojReal()
+        self._ahora     = self.reloj.monotonic if base == "monotonic" else self.reloj.time
+        self._usar_hilo = hilo
+        self._nombre    = nombre
+        self._heap      = []                 # (deadline, seq, clave, fn)
+        self._vigentes  = {}                 # clave → seq de la entrada válida
+        self._seq       = itertools.count()
+        self._cond      = threading.Condition()
+        self._hilo      = None
+        self._detenido  = False
+
+        self.despertares = 0
+        self.ejecutadas  = 0
+
+    # ── API ──────────────────────────────────────────────────────────────────
+    def ahora(self):
+        return self._ahora()
+
+    def programar(self, clave, deadline, fn):
+        """Programa `fn()` para `deadline` reemplazando la tarea de `clave`."""
+        with self._cond:
+            seq = next(self._seq)
+            self._vigentes[clave] = seq
+            heapq.heappush(self._heap, (deadline, seq, clave, fn))
+            self._cond.notify()
+        self._asegurar_hilo()
+
+    def programar_en(self, clave, segs, fn):
+        self.programar(clave, self._ahora() + segs, fn)
+
+    def cancelar(self, clave):
+        with self._cond:
+            if self._vigentes.pop(clave, None) is not None:
+                self._cond.notify()
+
+    def pendiente(self, clave):
+        """Deadline programado para `clave`, o None si no hay ninguno."""
+        with self._cond:
+            seq = self._vigentes.get(clave)
+            if seq is None:
+                return None
+            for deadline, s, _, _ in self._heap:
+                if s == seq:
+                    return deadline
+            return None
+
+    def detener(self):
+        with self._cond:
+            self._detenido = True
+            self._cond.notify_all()
+
+    def ejecutar_pendientes(self):
+        """Corre en el hilo actual todas las tareas vencidas. Devuelve cuántas."""
+        n = 0
+        while True:
+            with self._cond:
+                fn = self._sacar_vencida()
+            if fn is None:
+                return n
+            self._correr(fn)
+            n += 1
+
+    # ── Internos ─────────────────────────────────────────────────────────────
+    def _asegurar_hilo(self):
+        if not self._usar_hilo:
+            return
+        with self._cond:
+            if self._hilo is not None or self._detenido:
+                return
+            self._hilo = threading.Thread(target=self._loop, name=self._nombre, daemon=True)
+        self._hilo.start()
+
+    def _descartar_cancelados(self):
+        while self._heap and self._vigentes.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def _sacar_vencida(self):
+        """Saca la próxima tarea vencida (llamar con el lock tomado)."""
+        self._descartar_cancelados()
+        if not self._heap or self._heap[0][0] > self._ahora():
+            return None
+        _, _, clave, fn = heapq.heappop(self._heap)
+        del self._vigentes[clave]
+        return fn
+
+    def _correr(self, fn):
+        try:
+            fn()
+        except Exception as e:
+            print(f"[Adviser planificador] Error: {e}")
+        self.ejecutadas += 1
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._detenido:
+                        return
+                    fn = self._sacar_vencida()
+                    if fn is not None:
+                        break
+                    espera = MAX_ESPERA
+                    if self._heap:
+                        espera = min(MAX_ESPERA, self._heap[0][0] - self._ahora())
+                    self.reloj.esperar(self._cond, espera if self._heap else None)
+                    self.despertares += 1
+            self._correr(fn)
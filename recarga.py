@@ -0,0 +1,151 @@
+import os
+import threading
+
+from persistencia import firma, escritura_propia
+
+# ─── Recarga en caliente de archivos ─────────────────────────────────────────
+# Avisa con `on_cambio(ruta)` cuando el archivo vigilado cambia en disco por
+# fuera de la app (un editor, una herramienta de sincronización, un script).
+# Las escrituras de la propia app pasan por escribir_atomico(), que anota la
+# firma (mtime, tamaño) de lo que escribió; esas se ignoran.
+#
+# Dos implementaciones:
+#   - VigilanteWatchdog: eventos del sistema de archivos (si watchdog está).
+#   - VigilantePolling:  os.stat() cada `intervalo` segundos.
+# En ambas el aviso sale recién cuando el archivo dejó de cambiar, así no se
+# lee un archivo a medio escribir.
+
+
+class Vigilante:
+    """Interfaz común: un archivo vigilado a la vez."""
+
+    def __init__(self, on_cambio):
+        self._on_cambio = on_cambio
+        self._lock      = threading.Lock()
+        self.ruta       = None
+        self._ultima    = None     # firma ya procesada
+        self.cambios    = 0
+        self.ignorados  = 0
+
+    def vigilar(self, ruta):
+        """Cambia el archivo vigilado (p. ej. al cambiar de perfil)."""
+        with self._lock:
+            self.ruta    = os.path.abspath(ruta)
+            self._ultima = firma(self.ruta)
+
+    def iniciar(self):
+        pass
+
+    def detener(self):
+        pass
+
+    def _revisar(self):
+        """Compara la firma actual con la última vista y avisa si es ajena."""
+        with self._lock:
+            ruta = self.ruta
+            if ruta is None:
+                return
+            actual = firma(ruta)
+            if actual is None or actual == self._ultima:
+                return
+            self._ultima = actual
+            if escritura_propia(ruta, actual):
+                self.ignorados += 1
+                return
+            self.cambios += 1
+        try:
+            self._on_cambio(ruta)
+        except Exception as e:
+            print(f"[Adviser] Error al recargar {os.path.basename(ruta)}: {e}")
+
+
+class VigilantePolling(Vigilante):
+    def __init__(self, on_cambio, intervalo=1.0):
+        super().__init__(on_cambio)
+        self.intervalo = intervalo
+        self._parar    = threading.Event()
+        self._vista    = None      # firma nueva que todavía no se estabilizó
+
+    def iniciar(self):
+        self._parar.clear()
+        threading.Thread(target=self._loop, name="adviser-recarga", daemon=True).start()
+
+    def detener(self):
+        self._parar.set()
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            ruta = self.ruta
+            if ruta is None:
+                continue
+            actual = firma(ruta)
+            if actual != self._vista:
+                # Cambió desde la última vuelta: esperar a que se quede quieto
+                self._vista = actual
+                continue
+            self._revisar()
+
+
+class VigilanteWatchdog(Vigilante):
+    def __init__(self, on_cambio, demora=0.3):
+        super().__init__(on_cambio)
+        self.demora      = demora
+        self._observador = None
+        self._carpeta    = None
+        self._timer      = None
+
+    def vigilar(self, ruta):
+        super().vigilar(ruta)
+        if self._observador is not None and os.path.dirname(self.ruta) != self._carpeta:
+            self.detener()
+            self.iniciar()
+
+    def iniciar(self):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        vigilante = self
+
+        class _Manejador(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                rutas = (getattr(evento, "src_path", ""), getattr(evento, "dest_path", ""))
+                if vigilante.ruta in (os.path.abspath(r) for r in rutas if r):
+                    vigilante._programar()
+
+        self._carpeta    = os.path.dirname(self.ruta)
+        self._observador = Observer()
+        self._observador.schedule(_Manejador(), self._carpeta, recursive=False)
+        self._observador.daemon = True
+        self._observador.start()
+
+    def detener(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._observador is not None:
+            self._observador.stop()
+            self._observador = None
+
+    def _programar(self):
+        # Una ráfaga de eventos (tmp + replace) produce un solo aviso
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.demora, self._revisar)
+        self._timer.name   = "adviser-recarga"
+        self._timer.daemon = True
+        self._timer.start()
+
+
+def crear_vigilante(ruta, on_cambio, modo="auto"):
+    """watchdog si está instalado (y `modo` lo permite), si no polling."""
+    vigilante = None
+    if modo in ("auto", "watchdog"):
+        try:
+            import importlib.util
+            if importlib.util.find_spec("watchdog") is not None:
+                vigilante = VigilanteWatchdog(on_cambio)
+        except (ImportError, ValueError):
+            pass
+    if vigilante is None:
+        vigilante = VigilantePolling(on_cambio)
+    vigilante.vigilar(ruta)
+    return vigilante
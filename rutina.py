@@ -0,0 +1,235 @@
+import sys
+import threading
+
+# ─── Modelo de la rutina semanal ─────────────────────────────────────────────
+# Una grilla de 7 días × N franjas guardada en una sola lista plana de pares
+# (título, mensaje). Los textos se internan y los pares repetidos se
+# comparten, así que "(Vacío)" existe una sola vez aunque haya cientos de
+# celdas vacías en varios perfiles.
+#
+# Cada cambio de celda sube `version` y queda anotado en un log acotado, así
+# `cambios_desde(v)` devuelve sólo las celdas tocadas desde la versión v.
+#
+# La rutina se edita desde los hilos del bridge y desde el de recarga: cada
+# cambio y cada lectura de versión/log toma el lock de la rutina. Quien
+# necesita la versión junto con los datos usa foto() o delta().
+
+DIAS  = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
+VACIO = (sys.intern("(Vacío)"), sys.intern("Sin actividad asignada"))
+MAX_LOG_FACTOR = 4      # el log guarda hasta 4 × (cantidad de celdas) cambios
+SLOT_DEFECTO   = 60     # minutos por franja si no se indica otra cosa
+
+_pares = {VACIO: VACIO}
+
+
+def par(titulo, mensaje):
+    """Devuelve el par (título, mensaje) compartido para esos textos."""
+    clave = (str(titulo), str(mensaje))
+    existente = _pares.get(clave)
+    if existente is None:
+        existente = (sys.intern(clave[0]), sys.intern(clave[1]))
+        _pares[existente] = existente
+    return existente
+
+
+def slot_valido(valor, defecto=SLOT_DEFECTO, origen="slot_minutos"):
+    """Minutos por franja de `valor`; si falta o no divide al día, `defecto`."""
+    if valor is None:
+        return defecto
+    try:
+        if isinstance(valor, bool):
+            raise ValueError(valor)
+        minutos = int(valor)
+        if minutos <= 0 or 1440 % minutos:
+            raise ValueError(valor)
+        return minutos
+    except (TypeError, ValueError):
+        print(f"[Adviser] {origen} inválido ({valor!r}); se usan franjas de {defecto} min.")
+        return defecto
+
+
+def _normalizar_celda(celda):
+    if isinstance(celda, (list, tuple)) and len(celda) >= 2:
+        return par(celda[0], celda[1])
+    return VACIO
+
+
+class Rutina:
+    """Rutina semanal con franjas de `slot_minutos` (60, 30, 15...)."""
+
+    __slots__ = ("slot_minutos", "slots", "_celdas", "version", "_log", "_log_base", "_lock")
+
+    def __init__(self, slot_minutos=60):
+        slot_minutos = int(slot_minutos)
+        if slot_minutos <= 0 or 1440 % slot_minutos:
+            raise ValueError(f"slot_minutos inválido: {slot_minutos}")
+        self.slot_minutos = slot_minutos
+        self.slots        = 1440 // slot_minutos
+        self._celdas      = [VACIO] * (len(DIAS) * self.slots)
+        self.version      = 0
+        self._log         = []     # índice de celda cambiado en cada versión
+        self._log_base    = 0      # versión anterior a _log[0]
+        self._lock        = threading.RLock()
+
+    # ── Carga / guardado ─────────────────────────────────────────────────────
+    @classmethod
+    def desde_dict(cls, datos, slot_minutos=None):
+        """Valida y normaliza el formato de rutina.json una sola vez.
+
+        Si el archivo tiene otra granularidad que la pedida, las franjas se
+        dividen (p. ej. 1 h → 2 × 30 min) o se toma la primera de cada grupo.
+
+        Un `_slot_minutos` del archivo o un `slot_minutos` inválidos no
+        cortan la carga: se avisa y se usa la granularidad por defecto.
+        """
+        if not isinstance(datos, dict):
+            datos = {}
+        origen = slot_valido(datos.get("_slot_minutos"), SLOT_DEFECTO, "_slot_minutos")
+        r = cls(slot_valido(slot_minutos, origen))
+        for d, dia in enumerate(DIAS):
+            lista = datos.get(dia)
+            if not isinstance(lista, list) or not lista:
+                continue
+            n = len(lista)
+            base = d * r.slots
+            for slot in range(r.slots):
+                if n == r.slots:
+                    i = slot
+                elif n < r.slots and r.slots % n == 0:
+                    i = slot // (r.slots // n)
+                elif n > r.slots and n % r.slots == 0:
+                    i = slot * (n // r.slots)
+                else:
+                    i = slot
+                if i < n:
+                    r._celdas[base + slot] = _normalizar_celda(lista[i])
+        return r
+
+    def a_dict(self):
+        """{dia: [[título, mensaje], ...]} como lo espera el frontend."""
+        with self._lock:
+            return {dia: self.dia(dia) for dia in DIAS}
+
+    def foto(self):
+        """(version, a_dict()) leídos juntos."""
+        with self._lock:
+            return self.version, self.a_dict()
+
+    def a_json(self):
+        """Lo que se escribe en rutina.json (incluye la granularidad si no es 1 h)."""
+        datos = self.a_dict()
+        if self.slot_minutos != 60:
+            datos["_slot_minutos"] = self.slot_minutos
+        return datos
+
+    # ── Consultas ────────────────────────────────────────────────────────────
+    def _indice(self, dia, slot):
+        d = dia if isinstance(dia, int) else DIAS.index(dia)
+        slot = int(slot)
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"franja fuera de rango: {slot}")
+        return d * self.slots + slot
+
+    def celda(self, dia, slot):
+        """(título, mensaje) de un día (nombre o índice) y franja. O(1)."""
+        return self._celdas[self._indice(dia, slot)]
+
+    def dia(self, dia):
+        base = self._indice(dia, 0)
+        with self._lock:
+            celdas = self._celdas[base:base + self.slots]
+        return [list(c) for c in celdas]
+
+    def slot_de(self, hora, minuto=0):
+        return (hora * 60 + minuto) // self.slot_minutos
+
+    def cambios_desde(self, version):
+        """Celdas cambiadas después de `version` como [(dia, slot, título, mensaje)].
+
+        Devuelve None si esa versión ya no está en el log (hay que pedir todo).
+        """
+        return self.delta(version)[1]
+
+    def delta(self, version):
+        """(version actual, cambios_desde(version)) leídos juntos."""
+        version = int(version)
+        with self._lock:
+            if version < self._log_base or version > self.version:
+                return self.version, None
+            vistos = set()
+            cambios = []
+            for i in reversed(self._log[version - self._log_base:]):
+                if i in vistos:
+                    continue
+                vistos.add(i)
+                d, slot = divmod(i, self.slots)
+                titulo, mensaje = self._celdas[i]
+                cambios.append((DIAS[d], slot, titulo, mensaje))
+            cambios.reverse()
+            return self.version, cambios
+
+    def diferencias(self, otra):
+        """Celdas de `otra` que difieren de esta, como [(dia, slot, título, mensaje)].
+
+        Las dos rutinas tienen que tener la misma granularidad.
+        """
+        if otra.slots != self.slots:
+            raise ValueError("las rutinas tienen distinta granularidad")
+        with self._lock:
+            propias = list(self._celdas)
+        with otra._lock:
+            ajenas = list(otra._celdas)
+        cambios = []
+        for i, (actual, nueva) in enumerate(zip(propias, ajenas)):
+            if actual is not nueva and actual != nueva:
+                d, slot = divmod(i, self.slots)
+                cambios.append((DIAS[d], slot, nueva[0], nueva[1]))
+        return cambios
+
+    def copia(self):
+        """Otra Rutina con las mismas celdas (los pares se comparten)."""
+        r = Rutina(self.slot_minutos)
+        with self._lock:
+            r._celdas = list(self._celdas)
+        return r
+
+    # ── Edición ──────────────────────────────────────────────────────────────
+    def fijar(self, dia, slot, titulo, mensaje):
+        """Cambia una celda. Devuelve True si el contenido era distinto."""
+        i = self._indice(dia, slot)
+        nuevo = par(titulo, mensaje)
+        with self._lock:
+            if self._celdas[i] == nuevo:
+                return False
+            self._celdas[i] = nuevo
+            self._log.append(i)
+            self.version += 1
+            if len(self._log) > MAX_LOG_FACTOR * len(self._celdas):
+                corte = len(self._log) // 2
+                del self._log[:corte]
+                self._log_base += corte
+            return True
+
+    def fijar_dia(self, dia, entradas):
+        """Reemplaza las franjas de un día. Devuelve los índices que cambiaron."""
+        cambiados = []
+        with self._lock:
+            for slot, e in enumerate(entradas[:self.slots]):
+                celda = _normalizar_celda(e)
+                if self.fijar(dia, slot, celda[0], celda[1]):
+                    cambiados.append(slot)
+        return cambiados
+
+    def aplicar(self, celdas):
+        """Fija varias celdas [(dia, slot, título, mensaje)] de una vez.
+
+        Devuelve (versión previa, versión nueva, las que cambiaron): ningún
+        otro cambio se mete entre medio.
+        """
+        with self._lock:
+            desde = self.version
+            aplicadas = [c for c in celdas if self.fijar(*c)]
+            return desde, self.version, aplicadas
+
+    def __len__(self):
+        return len(self._celdas)
@@ -4,10 +4,14 @@ const DIAS_LABEL = ["Lun","Mar","Mié","Jue","Vie","Sáb","Dom"];
 
 let state = {
   rutina:      {},
+  rutinaVersion: 0,   // versión de la rutina que tiene la UI (ver get_rutina_since)
+  perfil:      null,
   diaVista:    "lunes",
   diaEditar:   "lunes",
   diaActual:   "lunes",
-  horaActual:  0,
+  slotActual:  0,
+  slotMin:     60,    // minutos por franja (ver rutina.py)
+  slots:       24,
   asistente:   false,
   tema:        "dark",
   appIniciada: false,
@@ -61,16 +65,20 @@ async function _inicializarApp() {
   if (!window.pywebview) return;
 
   const api = window.pywebview.api;
-  const [estado, rutina] = await Promise.all([
+  const [estado, sync] = await Promise.all([
     api.get_estado_inicial(),
-    api.get_rutina(),
+    api.get_rutina_since(-1),
   ]);
 
-  state.rutina     = rutina;
+  state.rutina        = sync.rutina;
+  state.rutinaVersion = sync.version;
+  state.perfil        = sync.perfil;
   state.diaVista   = estado.dia_actual;
   state.diaEditar  = estado.dia_actual;
   state.diaActual  = estado.dia_actual;
-  state.horaActual = estado.hora_actual;
+  state.slotMin    = estado.slot_minutos || 60;
+  state.slots      = Math.floor(1440 / state.slotMin);
+  state.slotActual = estado.slot_actual ?? estado.hora_actual;
   state.asistente  = estado.asistente;
   if (estado.tema) state.tema = estado.tema;
 
@@ -82,6 +90,7 @@ async function _inicializarApp() {
   buildEditList();
   updateAsistenteUI();
   startClock();
+  cargarPerfiles();
 }
 
 window.addEventListener('pywebviewready', () => {
@@ -142,10 +151,10 @@ function startClock() {
     const el = document.getElementById('status-time');
     if (el) el.textContent =
       `${String(now.getHours()).padStart(2,'0')}:${String(now.getMinutes()).padStart(2,'0')}`;
-    const nuevaHora = now.getHours();
+    const nuevoSlot = Math.floor((now.getHours() * 60 + now.getMinutes()) / state.slotMin);
     const nuevoDia  = DIAS[now.getDay() === 0 ? 6 : now.getDay() - 1];
-    if (nuevaHora !== state.horaActual || nuevoDia !== state.diaActual) {
-      state.horaActual = nuevaHora;
+    if (nuevoSlot !== state.slotActual || nuevoDia !== state.diaActual) {
+      state.slotActual = nuevoSlot;
       state.diaActual  = nuevoDia;
       refreshHoraActual();
     }
@@ -155,15 +164,20 @@ function startClock() {
 }
 
 // ── Rutina (vista) ────────────────────────────────────────────────────────────
+function etiquetaSlot(slot) {
+  const min = slot * state.slotMin;
+  return `${String(Math.floor(min / 60)).padStart(2,'0')}:${String(min % 60).padStart(2,'0')}`;
+}
+
 function buildHoursList() {
   const container = document.getElementById('hours-list');
   container.innerHTML = '';
-  for (let h = 0; h < 24; h++) {
+  for (let h = 0; h < state.slots; h++) {
     const card = document.createElement('div');
     card.className = 'hour-card';
     card.id = `hc-${h}`;
     card.innerHTML = `
-      <span class="card-time">${String(h).padStart(2,'0')}:00</span>
+      <span class="card-time">${etiquetaSlot(h)}</span>
       <div class="card-divider"></div>
       <div class="card-content">
         <div class="card-title" id="hc-title-${h}"></div>
@@ -178,17 +192,17 @@ function buildHoursList() {
 
 function renderDia(dia) {
   const lista = state.rutina[dia] || [];
-  for (let h = 0; h < 24; h++) {
+  for (let h = 0; h < state.slots; h++) {
     document.getElementById(`hc-title-${h}`).textContent = lista[h] ? lista[h][0] : '(Vacío)';
     document.getElementById(`hc-msg-${h}`).textContent   = lista[h] ? lista[h][1] : 'Sin actividad asignada';
-    document.getElementById(`hc-${h}`).classList.toggle('now', dia === state.diaActual && h === state.horaActual);
+    document.getElementById(`hc-${h}`).classList.toggle('now', dia === state.diaActual && h === state.slotActual);
   }
 }
 
 function refreshHoraActual() {
-  for (let h = 0; h < 24; h++) {
+  for (let h = 0; h < state.slots; h++) {
     const card = document.getElementById(`hc-${h}`);
-    if (card) card.classList.toggle('now', state.diaVista === state.diaActual && h === state.horaActual);
+    if (card) card.classList.toggle('now', state.diaVista === state.diaActual && h === state.slotActual);
   }
 }
 
@@ -214,11 +228,11 @@ function selectDia(dia) {
 function buildEditList() {
   const container = document.getElementById('edit-list');
   container.innerHTML = '';
-  for (let h = 0; h < 24; h++) {
+  for (let h = 0; h < state.slots; h++) {
     const card = document.createElement('div');
     card.className = 'edit-card';
     card.innerHTML = `
-      <span class="edit-time">${String(h).padStart(2,'0')}:00</span>
+      <span class="edit-time">${etiquetaSlot(h)}</span>
       <div class="edit-divider"></div>
       <div class="edit-fields">
         <input class="edit-input title-input" id="et-${h}" type="text" placeholder="Título...">
@@ -232,7 +246,7 @@ function buildEditList() {
 
 function cargarEditDia(dia) {
   const lista = state.rutina[dia] || [];
-  for (let h = 0; h < 24; h++) {
+  for (let h = 0; h < state.slots; h++) {
     document.getElementById(`et-${h}`).value = lista[h] ? lista[h][0] : '';
     document.getElementById(`em-${h}`).value = lista[h] ? lista[h][1] : '';
   }
@@ -244,17 +258,118 @@ function onEditDiaChange(val) {
 }
 
 async function guardarDia() {
+  const dia      = state.diaEditar;
+  const previas  = state.rutina[dia] || [];
   const entradas = [];
-  for (let h = 0; h < 24; h++) {
-    entradas.push([
+  const llamadas = [];
+  for (let h = 0; h < state.slots; h++) {
+    const celda = [
       document.getElementById(`et-${h}`).value.trim() || '(Vacío)',
       document.getElementById(`em-${h}`).value.trim() || 'Sin actividad asignada',
-    ]);
+    ];
+    entradas.push(celda);
+    // Sólo viajan las franjas que cambiaron
+    if (!previas[h] || previas[h][0] !== celda[0] || previas[h][1] !== celda[1]) {
+      llamadas.push(['guardar_celda', [dia, h, celda[0], celda[1]]]);
+    }
+  }
+  state.rutina[dia] = entradas;
+  if (window.pywebview && llamadas.length) {
+    // Un único viaje: las celdas y, al final, lo que haya cambiado desde afuera
+    llamadas.push(['get_rutina_since', [state.rutinaVersion, state.perfil]]);
+    const res = await window.pywebview.api.call_many(llamadas);
+    aplicarSync(res[res.length - 1]);
+  }
+  if (dia === state.diaVista) renderDia(state.diaVista);
+  showToast(`Rutina del ${capitalize(dia)} guardada ✓`);
+}
+
+// ── Sincronización incremental ────────────────────────────────────────────────
+function aplicarSync(sync) {
+  if (!sync) return;
+  if (sync.completo) {
+    state.perfil = sync.perfil;
+    aplicarRutina(sync.rutina, sync.slot_minutos);
+  } else {
+    const dias = new Set();
+    for (const [dia, slot, titulo, mensaje] of sync.celdas) {
+      (state.rutina[dia] = state.rutina[dia] || [])[slot] = [titulo, mensaje];
+      dias.add(dia);
+      if (dia === state.diaEditar) {
+        const et = document.getElementById(`et-${slot}`);
+        const em = document.getElementById(`em-${slot}`);
+        if (et) et.value = titulo;
+        if (em) em.value = mensaje;
+      }
+    }
+    if (dias.has(state.diaVista)) renderDia(state.diaVista);
+  }
+  state.rutinaVersion = sync.version;
+}
+
+async function sincronizarRutina() {
+  if (!window.pywebview || !state.appIniciada) return;
+  aplicarSync(await window.pywebview.api.get_rutina_since(state.rutinaVersion, state.perfil));
+}
+
+window.addEventListener('focus', sincronizarRutina);
+
+// rutina.json cambió por fuera de la app (recarga.py): trae sólo esas celdas
+window._onRutinaExterna = function(sync) {
+  if (sync.perfil === state.perfil && sync.desde === state.rutinaVersion) aplicarSync(sync);
+  else sincronizarRutina();
+};
+
+// ── Perfiles ──────────────────────────────────────────────────────────────────
+async function cargarPerfiles() {
+  if (!window.pywebview) return;
+  renderPerfiles(await window.pywebview.api.get_perfiles());
+}
+
+function renderPerfiles({ activo, perfiles }) {
+  const sel = document.getElementById('perfil-select');
+  if (!sel) return;
+  sel.innerHTML = perfiles.map(p =>
+    `<option value="${escapeHtml(p.nombre)}">${escapeHtml(p.nombre)}</option>`
+  ).join('');
+  sel.value = activo;
+}
+
+function aplicarRutina(rutina, slotMin) {
+  state.rutina = rutina;
+  if (slotMin && slotMin !== state.slotMin) {
+    // Otra granularidad: hay que rearmar las listas
+    const now = new Date();
+    state.slotMin    = slotMin;
+    state.slots      = Math.floor(1440 / slotMin);
+    state.slotActual = Math.floor((now.getHours() * 60 + now.getMinutes()) / slotMin);
+    buildHoursList();
+    buildEditList();
+  } else {
+    renderDia(state.diaVista);
+    cargarEditDia(state.diaEditar);
   }
-  state.rutina[state.diaEditar] = entradas;
-  if (window.pywebview) await window.pywebview.api.guardar_dia(state.diaEditar, entradas);
-  if (state.diaEditar === state.diaVista) renderDia(state.diaVista);
-  showToast(`Rutina del ${capitalize(state.diaEditar)} guardada ✓`);
+}
+
+async function cambiarPerfil(nombre) {
+  if (!window.pywebview) return;
+  const res = await window.pywebview.api.cambiar_perfil(nombre);
+  if (!res.ok) { showToast(res.error); return; }
+  state.perfil        = res.perfil;
+  state.rutinaVersion = res.version;
+  aplicarRutina(res.rutina, res.slot_minutos);
+  showToast(`Perfil "${nombre}" activo ✓`);
+}
+
+async function crearPerfil() {
+  if (!window.pywebview) return;
+  const nombre = (prompt('Nombre del nuevo perfil (copia la rutina actual):') || '').trim();
+  if (!nombre) return;
+  const res = await window.pywebview.api.crear_perfil(nombre, true);
+  if (!res.ok) { showToast(res.error); return; }
+  renderPerfiles(res);
+  await cambiarPerfil(nombre);
+  document.getElementById('perfil-select').value = nombre;
 }
 
 // ── Asistente ─────────────────────────────────────────────────────────────────
@@ -279,7 +394,7 @@ function updateAsistenteUI() {
   }
 }
 
-window._onAsistenteHora = (hora) => { state.horaActual = hora; refreshHoraActual(); };
+window._onAsistenteHora = (slot) => { state.slotActual = slot; refreshHoraActual(); };
 
 // ── Navegación interna (sidebar) ──────────────────────────────────────────────
 document.querySelectorAll('.nav-btn[data-panel]').forEach(btn => {
@@ -301,10 +416,13 @@ document.querySelectorAll('.nav-btn[data-panel]').forEach(btn => {
 const crono = {
   tiempoMin:     15,
   tareas:        [],
+  hechas:        0,       // se ajusta en cada toggle; el tick no recorre la lista
   timerID:       null,
   segsRestantes: 0,
   segsTotal:     0,
   iniciado:      false,
+  pausado:       false,   // sólo por la línea de comandos (crono pause)
+  pushV:         0,
 };
 
 // ── Selector de tiempo ────────────────────────────────────────────────────────
@@ -374,13 +492,46 @@ async function iniciarCronometro() {
   crono.segsTotal     = crono.tiempoMin * 60;
   crono.segsRestantes = crono.segsTotal;
   crono.iniciado      = true;
+  crono.hechas        = crono.tareas.filter(t => t.done).length;
 
   if (window.pywebview) {
-    await window.pywebview.api.crono_iniciar(JSON.stringify(crono.tareas), crono.segsTotal);
+    const res = await window.pywebview.api.crono_iniciar(JSON.stringify(crono.tareas), crono.segsTotal);
+    crono.pushV = res.v || 0;
+    (res.ids || []).forEach((id, i) => { crono.tareas[i].id = id; });
   } else {
     crono.timerID = setInterval(_tickJS, 1000);
   }
+  mostrarCronoCorriendo();
+}
+
+// Sesión iniciada desde la línea de comandos (`adviser crono start 25m`)
+window._onCronoExterno = function(p) {
+  crono.tareas        = p.tareas.map((texto, i) => ({ id: p.ids[i], texto, done: false }));
+  crono.hechas        = 0;
+  crono.tiempoMin     = Math.max(1, Math.round(p.segs / 60));
+  crono.segsTotal     = p.segs;
+  crono.segsRestantes = p.segs;
+  crono.iniciado      = true;
+  crono.pushV         = p.v || 0;
+  mostrarCronoCorriendo();
+};
+
+// Pausa, reanudación o corte desde la línea de comandos (`adviser crono stop`)
+window._onCronoExternoAccion = function(p) {
+  if (p.accion === 'stop') {
+    cerrarAlarma();
+    resetCrono();
+    return;
+  }
+  crono.pausado = (p.accion === 'pause');
+  if (p.segs !== undefined) crono.segsRestantes = p.segs;
+  document.getElementById('crono-time-display').classList.toggle('pausado', crono.pausado);
+  actualizarDisplay();
+};
 
+function mostrarCronoCorriendo() {
+  crono.pausado = false;
+  document.getElementById('crono-time-display').classList.remove('pausado');
   document.getElementById('crono-setup').style.display   = 'none';
   document.getElementById('crono-running').style.display = 'flex';
   document.getElementById('crono-resumen').style.display = 'none';
@@ -390,16 +541,21 @@ async function iniciarCronometro() {
 }
 
 // ── Callbacks desde Python ────────────────────────────────────────────────────
-window._cronoPythonTick = function(segsRestantes) {
-  crono.segsRestantes = segsRestantes;
-  actualizarDisplay();
+// Parches del canal de push (canal_push.py). Traen valores absolutos, así
+// que un parche perdido no deja el display desfasado.
+window._aplicarParche = function(p) {
+  crono.pushV = p.v;
+  if (p.segs !== undefined) {
+    crono.segsRestantes = p.segs;
+    actualizarDisplay();
+  }
 };
 
 window._cronoTiempoAgotado = function() {
   crono.segsRestantes = 0;
   if (crono.timerID) { clearInterval(crono.timerID); crono.timerID = null; }
   actualizarDisplay();
-  const hechas = crono.tareas.filter(t => t.done).length;
+  const hechas = crono.hechas;
   const total  = crono.tareas.length;
   if (hechas < total) document.getElementById('alarm-overlay').style.display = 'flex';
   mostrarResumen({
@@ -440,7 +596,7 @@ function actualizarDisplay() {
   if (prog <= 0.15)      ring.classList.add('danger');
   else if (prog <= 0.35) ring.classList.add('warning');
 
-  const hechas = crono.tareas.filter(t => t.done).length;
+  const hechas = crono.hechas;
   const total  = crono.tareas.length;
   document.getElementById('crono-progress-bar').style.width = (total ? hechas / total * 100 : 0) + '%';
   document.getElementById('btn-crono-finish').disabled = (hechas < total);
@@ -448,7 +604,7 @@ function actualizarDisplay() {
 
 function renderRunningLista() {
   const lista  = document.getElementById('crono-running-lista');
-  const hechas = crono.tareas.filter(t => t.done).length;
+  const hechas = crono.hechas;
   document.getElementById('crono-done-count').textContent = hechas;
   lista.innerHTML = crono.tareas.map((t, i) => `
     <div class="crono-run-item ${t.done ? 'done' : ''}" onclick="toggleTarea(${i})">
@@ -460,10 +616,11 @@ function renderRunningLista() {
 
 async function toggleTarea(idx) {
   crono.tareas[idx].done = !crono.tareas[idx].done;
+  crono.hechas += crono.tareas[idx].done ? 1 : -1;
   renderRunningLista();
   actualizarDisplay();
   if (window.pywebview) {
-    await window.pywebview.api.crono_toggle_tarea(idx, crono.tareas[idx].done);
+    await window.pywebview.api.crono_toggle_tarea(crono.tareas[idx].id, crono.tareas[idx].done);
   }
 }
 
@@ -472,12 +629,14 @@ async function agregarTareaRunning() {
   const texto = input.value.trim();
   if (!texto) return;
 
+  let id;
   if (window.pywebview) {
     const res = await window.pywebview.api.crono_agregar_tarea(texto);
     if (!res.ok) return;
+    id = res.id;
   }
 
-  crono.tareas.push({ texto, done: false });
+  crono.tareas.push({ id, texto, done: false });
   input.value = '';
   document.getElementById('crono-total-count').textContent = crono.tareas.length;
   renderRunningLista();
@@ -494,7 +653,7 @@ async function finalizarSesion() {
 
 function _mostrarResumenFinal() {
   const total     = crono.tareas.length;
-  const hechas    = crono.tareas.filter(t => t.done).length;
+  const hechas    = crono.hechas;
   const segsUsados = crono.segsTotal - crono.segsRestantes;
   const min = Math.floor(segsUsados / 60), seg = segsUsados % 60;
   const tiempoStr = min > 0 ? `${min}min ${String(seg).padStart(2,'0')}s` : `${seg}s`;
@@ -536,8 +695,9 @@ function mostrarResumen({ icono, titulo, sub, chips }) {
 function nuevaSesion() { resetCrono(); }
 
 function resetCrono() {
-  crono.tareas = []; crono.tiempoMin = 15;
+  crono.tareas = []; crono.hechas = 0; crono.tiempoMin = 15;
   crono.segsRestantes = 0; crono.segsTotal = 0; crono.iniciado = false;
+  crono.pausado = false;
   if (crono.timerID) { clearInterval(crono.timerID); crono.timerID = null; }
 
   document.getElementById('crono-setup').style.display   = 'block';
@@ -0,0 +1,126 @@
+import threading
+from collections import namedtuple
+
+# ─── Tareas del cronómetro ───────────────────────────────────────────────────
+# Cada tarea recibe un id estable al entrar (no cambia aunque se agreguen
+# otras). Los ids son correlativos desde 0 y nunca se borran, así que el id
+# es la posición en una lista: buscar y marcar son O(1). Las tareas son
+# tuplas inmutables: marcar una reemplaza su entrada entera. `hechas` se
+# ajusta en cada cambio.
+#
+# Todo pasa por un lock: quien necesita varios datos juntos (contadores y
+# página del overlay) los pide en una sola lectura con foto(), nunca mezcla
+# dos versiones.
+#
+# El overlay pide una página de pendientes a partir de un cursor; la página
+# salta las hechas que encuentre en el camino. Ese costo es de paginar (al
+# abrir el overlay o al hacer scroll), no de cada tick ni de cada toggle.
+#
+# Al terminar la sesión el almacén se congela: desde ahí es de sólo lectura
+# y cualquier cambio levanta RuntimeError.
+
+Tarea = namedtuple("Tarea", "id texto done")
+
+
+class AlmacenTareas:
+    def __init__(self, tareas=()):
+        """`tareas` es la lista [{texto, done}] que manda el JS al iniciar."""
+        self._tareas    = []                   # id → Tarea (el id es la posición)
+        self._lock      = threading.Lock()
+        self._congelado = False
+        self.hechas     = 0
+        for t in tareas:
+            self.agregar(t.get("texto", ""), t.get("done", False))
+
+    def __len__(self):
+        return len(self._tareas)
+
+    @property
+    def total(self):
+        return len(self._tareas)
+
+    def obtener(self, tarea_id):
+        return self._tareas[self._indice(tarea_id)]
+
+    def ids(self):
+        return list(range(len(self._tareas)))
+
+    @property
+    def congelado(self):
+        return self._congelado
+
+    def congelar(self):
+        """Deja el almacén de sólo lectura. Devuelve el mismo almacén."""
+        with self._lock:
+            self._congelado = True
+        return self
+
+    def _verificar_abierto(self):
+        if self._congelado:
+            raise RuntimeError("la sesión ya terminó: sus tareas no se pueden cambiar")
+
+    def _indice(self, tarea_id):
+        i = int(tarea_id)
+        if not 0 <= i < len(self._tareas):
+            raise KeyError(f"tarea inexistente: {tarea_id}")
+        return i
+
+    # ── Cambios ──────────────────────────────────────────────────────────────
+    def agregar(self, texto, done=False):
+        """Alta de una tarea. Devuelve la Tarea con su id. O(1)."""
+        with self._lock:
+            self._verificar_abierto()
+            tarea = Tarea(len(self._tareas), str(texto), bool(done))
+            self._tareas.append(tarea)
+            if tarea.done:
+                self.hechas += 1
+            return tarea
+
+    def marcar(self, tarea_id, done):
+        """Marca una tarea. Devuelve la Tarea nueva, o None si ya estaba así. O(1)."""
+        with self._lock:
+            self._verificar_abierto()
+            i     = self._indice(tarea_id)
+            tarea = self._tareas[i]
+            done  = bool(done)
+            if tarea.done == done:
+                return None
+            tarea = tarea._replace(done=done)
+            self._tareas[i] = tarea
+            self.hechas += 1 if done else -1
+            return tarea
+
+    # ── Lectura ──────────────────────────────────────────────────────────────
+    def pagina(self, desde=0, cantidad=30):
+        """Hasta `cantidad` pendientes con id >= `desde`.
+
+        Devuelve (tareas, siguiente): `siguiente` es el id desde el que pedir
+        la página que sigue, o None si no quedan más.
+        """
+        with self._lock:
+            return self._pagina(int(desde), cantidad)
+
+    def foto(self, cantidad=30):
+        """(hechas, total, primera página, siguiente) en una sola lectura."""
+        with self._lock:
+            tareas, siguiente = self._pagina(0, cantidad)
+            return self.hechas, len(self._tareas), tareas, siguiente
+
+    def _pagina(self, desde, cantidad):
+        n = len(self._tareas)
+        if self.hechas == n:
+            return [], None
+        i, tareas = max(0, desde), []
+        while i < n and len(tareas) < cantidad:
+            t = self._tareas[i]
+            if not t.done:
+                tareas.append(t._asdict())
+            i += 1
+        while i < n and self._tareas[i].done:
+            i += 1
+        return tareas, (i if i < n else None)
+
+    def a_json(self):
+        """Todas las tareas como [{id, texto, done}] (resúmenes, historial)."""
+        with self._lock:
+            return [t._asdict() for t in self._tareas]